@@ -16,7 +16,6 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from wg_manager.logger import setup_logging, get_logger
-from wg_manager.ui import WireGuardManagerApp
 
 
 def setup_global_exception_handler(logger):
@@ -111,9 +110,10 @@ def main():
     
     try:
         # Запуск GTK приложения
-        import gi
-        gi.require_version('Gtk', '3.0')
-        from gi.repository import Gtk
+        from wg_manager._gtk_boot import ensure_gtk
+        ensure_gtk()
+        # GUI импортируется только здесь, чтобы --no-gui не загружал GTK
+        from wg_manager.ui import WireGuardManagerApp
         
         app = WireGuardManagerApp()
         exit_code = app.run(sys.argv)
@@ -3,8 +3,7 @@
 """
 
 from .core import WireGuardManager, ProfileStatus, ProfileInfo, get_manager
-from .logger import setup_logging, get_logger, Timer, export_logs
-from .ui import WireGuardManagerApp
+from .logger import setup_logging, get_logger, Timer, export_logs, read_log_tail
 
 __version__ = '1.0.0'
 __all__ = [
@@ -16,5 +15,14 @@ __all__ = [
     'get_logger',
     'Timer',
     'export_logs',
+    'read_log_tail',
     'WireGuardManagerApp'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    """Ленивый импорт GUI: GTK загружается только при первом обращении"""
+    if name == 'WireGuardManagerApp':
+        from .ui import WireGuardManagerApp
+        return WireGuardManagerApp
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
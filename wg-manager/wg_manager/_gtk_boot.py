@@ -0,0 +1,34 @@
+"""
+Инициализация GTK для WireGuard Manager
+Фиксирует версии typelib один раз для всего процесса
+"""
+
+import functools
+
+
+# Версии библиотек GObject Introspection, используемые приложением
+GI_VERSIONS = {
+    'Gtk': '3.0',
+    'Gdk': '3.0',
+    'GLib': '2.0',
+    'Pango': '1.0',
+}
+
+
+@functools.lru_cache(maxsize=None)
+def ensure_gtk():
+    """
+    Загрузить gi и зафиксировать версии всех typelib одним вызовом
+    
+    Повторные вызовы возвращают уже загруженный модуль.
+    
+    Returns:
+        Модуль gi.repository.Gtk
+    """
+    import gi
+    gi.require_versions(GI_VERSIONS)
+    from gi.repository import Gtk
+    return Gtk
+
+
+__all__ = ['ensure_gtk']
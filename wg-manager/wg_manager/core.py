@@ -4,19 +4,59 @@
 """
 
 import os
+import re
+import random
+import shlex
+import logging
 import subprocess
 import time
 import threading
 import shutil
 import json
+from datetime import datetime
 from pathlib import Path
-from typing import List, Tuple, Optional, Dict, Any
+from typing import List, Tuple, Optional, Dict, Any, FrozenSet
 from dataclasses import dataclass
 from enum import Enum
 
 from .logger import get_logger, Timer
 
 
+# Заголовок обязательной секции конфигурации wg-quick (допускается комментарий)
+_RE_IFACE = re.compile(r'^\s*\[Interface\]\s*(?:#.*)?$', re.MULTILINE)
+
+# Размер начального фрагмента конфигурации, читаемого при валидации
+_CONF_HEAD_SIZE = 4096
+
+# Классификация ошибок выполнения команд (по stderr)
+_AUTH_ERR_RE = re.compile(r'authentication canceled|not authorized', re.IGNORECASE)
+_NOTFOUND_RE = re.compile(r'command not found', re.IGNORECASE)
+_PERM_RE = re.compile(r'permission denied', re.IGNORECASE)
+# Ошибки, после которых повторять команду бессмысленно
+_NORETRY_RE = re.compile(
+    r'таймаут|permission denied|not found|authentication canceled',
+    re.IGNORECASE
+)
+
+# Начало текста, который get_wg_show_output возвращает при ошибке
+_WG_SHOW_ERROR_PREFIX = 'Ошибка получения статуса:'
+
+# Номер capability CAP_NET_ADMIN (linux/capability.h), нужной для wg show
+_CAP_NET_ADMIN = 12
+
+def _has_net_admin() -> bool:
+    """Проверить, есть ли у процесса capability CAP_NET_ADMIN"""
+    try:
+        with open('/proc/self/status', 'r', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('CapEff:'):
+                    return bool(int(line.split()[1], 16) & (1 << _CAP_NET_ADMIN))
+    except (OSError, ValueError, IndexError):
+        pass
+    # Без /proc ориентируемся на эффективный UID
+    return hasattr(os, 'geteuid') and os.geteuid() == 0
+
+
 class ProfileStatus(Enum):
     """Статус профиля WireGuard"""
     ACTIVE = "active"
@@ -42,31 +82,74 @@ class ProfileInfo:
 class WireGuardManager:
     """Менеджер профилей WireGuard"""
     
+    # Найденные пути к командам: расположение не меняется за время работы
+    _which_cache: Dict[str, str] = {}
+    
     def __init__(self):
         self.logger = get_logger(__name__)
-        self._lock = threading.RLock()
+        # Сериализует изменения состояния (wg-quick up/down)
+        self._lock = threading.Lock()
         self._active_profile: Optional[str] = None
         self._profiles_cache: Dict[str, ProfileInfo] = {}
+        # Снимок `wg show all dump`: (время monotonic, данные или None)
+        self._snapshot: Optional[Tuple[float, Optional[Dict[str, Dict[str, Any]]]]] = None
+        # Кэш проверок профилей: {имя: (mtime файла, результат валидации)}
+        self._validation_cache: Dict[str, Tuple[float, Tuple[bool, str]]] = {}
+        # Кэш списка конфигураций: (mtime директории в нс, имена профилей)
+        self._conf_set_cache: Optional[Tuple[int, FrozenSet[str]]] = None
+        # Кэш вывода команд только для чтения: {команда: (время monotonic, успех, вывод)}
+        self._cmd_cache: Dict[Tuple[str, ...], Tuple[float, bool, str]] = {}
+        self._cmd_cache_lock = threading.Lock()
+        # Требуется ли pkexec для wg show (None = еще не проверялось)
+        self._read_needs_pkexec: Optional[bool] = None
         
         # Конфигурационные пути
         self.config_dir = Path('/etc/wireguard')
-        self.profiles = []  # Будет заполнено из конфигурации
+        # Профили загружаются из конфигурации при первом обращении к self.profiles
+        self._profiles_list: List[str] = []
+        self._name_by_lower: Dict[str, str] = {}
+        self._config_loaded = False
+        self._config_lock = threading.Lock()
         
         # Таймауты (в секундах)
         self.timeout_wg_quick = 60
         self.timeout_wg_show = 30
         
+        # Время жизни снимка состояния интерфейсов (в секундах)
+        self.snapshot_ttl = 1.0
+        # Время жизни кэша команд только для чтения (в секундах)
+        self.cmd_cache_ttl = 1.0
+        
         # Параметры повторных попыток
         self.max_retries = 3
-        self.retry_delay = 1.0  # секунды между попытками
-        
-        # Загрузка конфигурации
-        self._load_config()
+        self.retry_delay = 1.0  # базовая задержка между попытками (секунды)
+        self.retry_backoff_max = 5.0  # верхняя граница задержки (секунды)
+    
+    @property
+    def profiles(self) -> List[str]:
+        """Список профилей (конфигурация загружается при первом обращении)"""
+        self._ensure_config()
+        return self._profiles_list
+    
+    def _ensure_config(self) -> None:
+        """Загрузить конфигурацию, если она еще не загружена"""
+        if self._config_loaded:
+            return
         
-        # Если профили не заданы в конфигурации, используем значения по умолчанию
-        if not self.profiles:
-            self.profiles = ['App', 'bomBox', 'usa']
-            self.logger.info(f'Используются профили по умолчанию: {self.profiles}')
+        with self._config_lock:
+            if self._config_loaded:
+                return
+            
+            self._load_config()
+            
+            # Если профили не заданы в конфигурации, используем значения по умолчанию
+            if not self._profiles_list:
+                self._profiles_list = ['App', 'bomBox', 'usa']
+                self.logger.info(f'Используются профили по умолчанию: {self._profiles_list}')
+            
+            # Соответствие имени интерфейса (в нижнем регистре) имени профиля
+            self._name_by_lower = {p.lower(): p for p in self._profiles_list}
+            self._config_loaded = True
     
     def _load_config(self):
         """Загрузить конфигурацию из файла"""
@@ -77,12 +160,11 @@ class WireGuardManager:
             return
         
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = json.loads(config_path.read_bytes())
             
             if 'profiles' in config and isinstance(config['profiles'], list):
-                self.profiles = config['profiles']
-                self.logger.info(f'Загружены профили из конфигурации: {self.profiles}')
+                self._profiles_list = config['profiles']
+                self.logger.info(f'Загружены профили из конфигурации: {self._profiles_list}')
             
             # Можно добавить загрузку других параметров конфигурации здесь
             # if 'timeout_wg_show' in config:
@@ -93,68 +175,79 @@ class WireGuardManager:
         except Exception as e:
             self.logger.error(f'Ошибка загрузки конфигурации из {config_path}: {e}')
     
-    def _run_command(self, command: List[str], timeout: int = 30) -> Tuple[bool, str]:
+    def _run_command(self, command: List[str], timeout: int = 30,
+                     decode_output: bool = True, use_pkexec: bool = True) -> Tuple[bool, str]:
         """
         Выполнить команду через pkexec с проверкой прав
         
+        Метод не берет блокировку: команды чтения (wg show) выполняются
+        параллельно и согласуются через TTL-кэш, а изменения состояния
+        сериализуются блокировкой self._lock в activate_profile/turn_off_all.
+        
         Args:
             command: Список аргументов команды
             timeout: Таймаут выполнения в секундах
+            decode_output: Декодировать stdout при успехе (False = вернуть пустую строку)
+            use_pkexec: Запускать через pkexec (False = напрямую)
         
         Returns:
             Кортеж (успех, вывод)
         """
-        with self._lock:
-            full_command = ['pkexec'] + command
-            self.logger.debug(f'Выполнение команды: {" ".join(full_command)}')
+        full_command = ['pkexec'] + command if use_pkexec else command
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('Выполнение команды: %s', shlex.join(full_command))
+        
+        # Время измеряется напрямую: Timer здесь дублировал бы замер и
+        # создавал объект и строки на каждый вызов
+        start_time = time.perf_counter_ns()
+        try:
+            result = subprocess.run(
+                full_command,
+                capture_output=True,
+                timeout=timeout
+            )
             
-            start_time = time.time()
-            try:
-                with Timer(f'Команда: {" ".join(command)}', self.logger):
-                    result = subprocess.run(
-                        full_command,
-                        capture_output=True,
-                        text=True,
-                        timeout=timeout,
-                        encoding='utf-8'
-                    )
-                
-                elapsed = time.time() - start_time
-                
-                if result.returncode == 0:
-                    self.logger.debug(
-                        f'Команда выполнена успешно за {elapsed:.2f}с: '
-                        f'{result.stdout[:200]}...'
+            elapsed = (time.perf_counter_ns() - start_time) / 1_000_000_000
+            
+            if result.returncode == 0:
+                self.logger.debug(
+                    'Команда выполнена успешно за %.2fс (%d байт вывода)',
+                    elapsed, len(result.stdout)
+                )
+                if not decode_output:
+                    return True, ''
+                return True, result.stdout.decode('utf-8', 'replace')
+            else:
+                # Вывод декодируем только при ошибке
+                stderr = result.stderr.decode('utf-8', 'replace')
+                # Анализ типа ошибки
+                if _AUTH_ERR_RE.search(stderr):
+                    self.logger.warning(
+                        'Аутентификация отменена или недостаточно прав (код %d) за %.2fс',
+                        result.returncode, elapsed
                     )
-                    return True, result.stdout
+                elif _NOTFOUND_RE.search(stderr):
+                    self.logger.error('Команда не найдена: %s', shlex.join(command))
+                elif _PERM_RE.search(stderr):
+                    self.logger.error('Отказано в доступе: %s', stderr)
                 else:
-                    # Анализ типа ошибки
-                    stderr_lower = result.stderr.lower()
-                    if 'authentication canceled' in stderr_lower or 'not authorized' in stderr_lower:
-                        self.logger.warning(
-                            f'Аутентификация отменена или недостаточно прав '
-                            f'(код {result.returncode}) за {elapsed:.2f}с'
-                        )
-                    elif 'command not found' in stderr_lower:
-                        self.logger.error(f'Команда не найдена: {" ".join(command)}')
-                    elif 'permission denied' in stderr_lower:
-                        self.logger.error(f'Отказано в доступе: {result.stderr}')
-                    else:
-                        self.logger.error(
-                            f'Команда завершилась с ошибкой (код {result.returncode}) '
-                            f'за {elapsed:.2f}с: {result.stderr}'
-                        )
-                    return False, result.stderr
-                    
-            except subprocess.TimeoutExpired:
-                self.logger.error(f'Таймаут выполнения команды: {" ".join(command)}')
-                return False, f'Таймаут ({timeout} секунд)'
-            except Exception as e:
-                self.logger.error(f'Ошибка выполнения команды: {e}')
-                return False, str(e)
+                    self.logger.error(
+                        'Команда завершилась с ошибкой (код %d) за %.2fс: %s',
+                        result.returncode, elapsed, stderr
+                    )
+                return False, stderr
+                
+        except subprocess.TimeoutExpired:
+            self.logger.error('Таймаут выполнения команды: %s', shlex.join(command))
+            return False, f'Таймаут ({timeout} секунд)'
+        except Exception as e:
+            self.logger.error('Ошибка выполнения команды: %s', e)
+            return False, str(e)
     
     def _run_command_with_retry(self, command: List[str], timeout: int = 30, 
-                                max_retries: Optional[int] = None) -> Tuple[bool, str]:
+                                max_retries: Optional[int] = None,
+                                decode_output: bool = True,
+                                use_pkexec: bool = True) -> Tuple[bool, str]:
         """
         Выполнить команду с повторными попытками при неудаче
         
@@ -162,6 +255,8 @@ class WireGuardManager:
             command: Список аргументов команды
             timeout: Таймаут выполнения в секундах
             max_retries: Максимальное количество попыток (None = использовать self.max_retries)
+            decode_output: Декодировать stdout при успехе (False = вернуть пустую строку)
+            use_pkexec: Запускать через pkexec (False = напрямую)
         
         Returns:
             Кортеж (успех, вывод)
@@ -171,31 +266,85 @@ class WireGuardManager:
         
         last_error = ""
         for attempt in range(max_retries):
-            success, output = self._run_command(command, timeout)
+            success, output = self._run_command(command, timeout, decode_output, use_pkexec)
             
             if success:
                 if attempt > 0:
-                    self.logger.info(f'Команда выполнена успешно с {attempt+1} попытки')
+                    self.logger.info('Команда выполнена успешно с %d попытки', attempt + 1)
                 return True, output
             
             last_error = output
             self.logger.warning(
-                f'Попытка {attempt+1}/{max_retries} не удалась: {output}'
+                'Попытка %d/%d не удалась: %s', attempt + 1, max_retries, output
             )
             
             # Не повторяем после таймаута или определенных ошибок
-            output_lower = output.lower()
-            if ("Таймаут" in output or "Permission denied" in output_lower or 
-                "not found" in output_lower or "authentication canceled" in output_lower):
+            if _NORETRY_RE.search(output):
                 break
             
-            # Задержка перед следующей попыткой
+            # Экспоненциальная задержка со случайным разбросом перед следующей попыткой
             if attempt < max_retries - 1:
-                time.sleep(self.retry_delay)
+                delay = min(self.retry_delay * (2 ** attempt), self.retry_backoff_max)
+                time.sleep(delay * (0.5 + random.random() * 0.5))
         
-        self.logger.error(f'Все {max_retries} попыток выполнения команды не удались: {last_error}')
+        self.logger.error('Все %d попыток выполнения команды не удались: %s', max_retries, last_error)
         return False, last_error
     
+    def _run_cached_command(self, command: List[str], timeout: int = 30,
+                            force: bool = False) -> Tuple[bool, str]:
+        """
+        Выполнить команду только для чтения с кэшированием результата
+        
+        Результат хранится cmd_cache_ttl секунд и сбрасывается при
+        изменении состояния интерфейсов.
+        
+        Args:
+            command: Список аргументов команды
+            timeout: Таймаут выполнения в секундах
+            force: Игнорировать кэш и выполнить команду
+        
+        Returns:
+            Кортеж (успех, вывод)
+        """
+        key = tuple(command)
+        if not force:
+            with self._cmd_cache_lock:
+                cached = self._cmd_cache.get(key)
+            if cached is not None and time.monotonic() - cached[0] < self.cmd_cache_ttl:
+                return cached[1], cached[2]
+        
+        now = time.monotonic()
+        success, output = self._run_command_with_retry(
+            command,
+            timeout,
+            use_pkexec=self._wg_show_needs_pkexec()
+        )
+        with self._cmd_cache_lock:
+            self._cmd_cache[key] = (now, success, output)
+        return success, output
+    
+    def _wg_show_needs_pkexec(self) -> bool:
+        """
+        Нужен ли pkexec для команд чтения wg show
+        
+        Если у процесса уже есть CAP_NET_ADMIN (запуск от root или выданная
+        capability), wg show выполняется напрямую, без обращения к PolicyKit.
+        Результат проверки кэшируется.
+        
+        Returns:
+            True если требуется pkexec
+        """
+        if self._read_needs_pkexec is None:
+            self._read_needs_pkexec = not _has_net_admin()
+            if not self._read_needs_pkexec:
+                self.logger.info('Процесс имеет CAP_NET_ADMIN, wg show выполняется без pkexec')
+        return self._read_needs_pkexec
+    
+    def _clear_command_cache(self) -> None:
+        """Сбросить кэш вывода команд только для чтения"""
+        with self._cmd_cache_lock:
+            self._cmd_cache.clear()
+    
     def check_profile_exists(self, profile_name: str) -> bool:
         """
         Проверить существование профиля
@@ -211,18 +360,44 @@ class WireGuardManager:
             self.logger.debug(f'Предполагаем существование стандартного профиля: {profile_name}')
             return True
         
-        config_file = self.config_dir / f'{profile_name}.conf'
+        exists = profile_name in self._list_confs()
+        self.logger.debug(f'Проверка профиля {profile_name}: {exists}')
+        return exists
+    
+    def _list_confs(self) -> FrozenSet[str]:
+        """
+        Получить имена профилей, для которых есть файлы конфигурации
+        
+        Директория читается одним os.scandir, результат кэшируется до
+        изменения mtime директории.
+        
+        Returns:
+            Множество имен профилей (без расширения .conf)
+        """
+        try:
+            key = os.stat(self.config_dir).st_mtime_ns
+        except OSError:
+            return frozenset()
+        
+        cached = self._conf_set_cache
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        
         try:
-            exists = config_file.exists()
-            self.logger.debug(f'Проверка профиля {profile_name}: {exists}')
-            return exists
+            with os.scandir(self.config_dir) as entries:
+                names = frozenset(
+                    entry.name[:-5] for entry in entries if entry.name.endswith('.conf')
+                )
         except PermissionError:
-            # Для нестандартных профилей без прав возвращаем False
-            self.logger.debug(f'Нет прав на чтение {config_file}, предполагаем что профиль не существует')
-            return False
+            # Без прав на чтение считаем, что нестандартных профилей нет
+            self.logger.debug(f'Нет прав на чтение {self.config_dir}, предполагаем что профилей нет')
+            names = frozenset()
         except Exception as e:
-            self.logger.error(f'Ошибка проверки профиля {profile_name}: {e}')
-            return False
+            self.logger.error(f'Ошибка чтения директории {self.config_dir}: {e}')
+            names = frozenset()
+        
+        self._conf_set_cache = (key, names)
+        return names
     
     def validate_profile(self, profile_name: str) -> Tuple[bool, str]:
         """
@@ -240,13 +415,32 @@ class WireGuardManager:
         # Базовая проверка конфигурационного файла
         config_file = self.config_dir / f'{profile_name}.conf'
         try:
-            content = config_file.read_text(encoding='utf-8')
+            # Повторно используем результат, пока файл не изменился
+            mtime = os.stat(config_file).st_mtime
+            cached = self._validation_cache.get(profile_name)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+            
+            # Конфигурации WireGuard небольшие: читаем только начало файла
+            fd = os.open(config_file, os.O_RDONLY)
+            try:
+                head = os.read(fd, _CONF_HEAD_SIZE)
+            finally:
+                os.close(fd)
+            content = head.decode('utf-8', 'replace')
+            if len(head) == _CONF_HEAD_SIZE and not _RE_IFACE.search(content):
+                # Заголовок может находиться дальше - читаем файл целиком
+                content = config_file.read_text(encoding='utf-8')
+            
             # Проверяем наличие обязательных секций
-            if '[Interface]' not in content:
-                return False, 'Отсутствует секция [Interface]'
+            if not _RE_IFACE.search(content):
+                result = (False, 'Отсутствует секция [Interface]')
+            else:
+                self.logger.info(f'Профиль {profile_name} прошел валидацию')
+                result = (True, 'OK')
             
-            self.logger.info(f'Профиль {profile_name} прошел валидацию')
-            return True, 'OK'
+            self._validation_cache[profile_name] = (mtime, result)
+            return result
         except (PermissionError, FileNotFoundError):
             # Для стандартных профилей без прав или отсутствующего файла пропускаем валидацию
             if profile_name in self.profiles:
@@ -259,56 +453,155 @@ class WireGuardManager:
             self.logger.error(f'Ошибка чтения профиля {profile_name}: {e}')
             return False, f'Ошибка чтения файла: {e}'
     
-    def get_active_profile(self) -> Optional[str]:
+    def snapshot(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Получить снимок состояния всех интерфейсов WireGuard
+        
+        Выполняет `wg show all dump` один раз и кэширует результат
+        на snapshot_ttl секунд, чтобы серия запросов статуса обходилась
+        одним вызовом подпроцесса.
+        
+        Returns:
+            Словарь {имя интерфейса: данные} или None при ошибке
+        """
+        now = time.monotonic()
+        cached = self._snapshot
+        if cached is not None and now - cached[0] < self.snapshot_ttl:
+            return cached[1]
+        
+        success, output = self._run_command_with_retry(
+            ['wg', 'show', 'all', 'dump'],
+            timeout=self.timeout_wg_show,
+            use_pkexec=self._wg_show_needs_pkexec()
+        )
+        
+        if success:
+            data = self._parse_dump(output)
+        else:
+            self.logger.warning('Не удалось получить информацию о подключениях')
+            data = None
+        
+        self._snapshot = (now, data)
+        return data
+    
+    def invalidate_snapshot(self) -> None:
+        """Сбросить кэшированный снимок состояния интерфейсов"""
+        self._snapshot = None
+    
+    @staticmethod
+    def _parse_dump(output: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Разобрать вывод `wg show all dump`
+        
+        Строка интерфейса содержит 5 полей, разделенных табуляцией:
+        interface, private-key, public-key, listen-port, fwmark.
+        Строка пира содержит 9 полей: interface, public-key, preshared-key,
+        endpoint, allowed-ips, latest-handshake, transfer-rx, transfer-tx,
+        persistent-keepalive.
+        
+        Args:
+            output: Вывод команды
+        
+        Returns:
+            Словарь {имя интерфейса: данные}
+        """
+        interfaces: Dict[str, Dict[str, Any]] = {}
+        for line in output.splitlines():
+            fields = line.split('\t')
+            if len(fields) == 5:
+                # Приватный ключ (fields[1]) намеренно не сохраняем
+                interfaces[fields[0]] = {
+                    'public_key': fields[2],
+                    'listen_port': fields[3],
+                    'endpoint': '',
+                    'last_handshake': 0,
+                    'transfer_rx': 0,
+                    'transfer_tx': 0,
+                }
+            elif len(fields) == 9:
+                iface = interfaces.get(fields[0])
+                if iface is None:
+                    continue
+                endpoint = fields[3]
+                if not iface['endpoint'] and endpoint != '(none)':
+                    iface['endpoint'] = endpoint
+                try:
+                    iface['last_handshake'] = max(iface['last_handshake'], int(fields[5]))
+                    iface['transfer_rx'] += int(fields[6])
+                    iface['transfer_tx'] += int(fields[7])
+                except ValueError:
+                    continue
+        return interfaces
+    
+    def _profile_for_interface(self, interface: str) -> Optional[str]:
+        """
+        Определить профиль по имени интерфейса
+        
+        wg-quick называет интерфейс по имени файла конфигурации, поэтому
+        сначала ищется точное совпадение; префикс "wg-" отбрасывается
+        только если профиля с полным именем нет.
+        
+        Args:
+            interface: Имя интерфейса WireGuard
+        
+        Returns:
+            Имя профиля или None
+        """
+        self._ensure_config()
+        key = interface.lower()
+        profile = self._name_by_lower.get(key)
+        if profile is None and key.startswith('wg-'):
+            profile = self._name_by_lower.get(key[3:])
+        return profile
+    
+    def get_active_profile(self, snapshot: Optional[Dict[str, Dict[str, Any]]] = None) -> Optional[str]:
         """
         Получить имя активного профиля
         
+        Args:
+            snapshot: Снимок состояния интерфейсов (None = получить через snapshot())
+        
         Returns:
             Имя активного профиля или None
         """
         with Timer('Получение активного профиля', self.logger):
-            success, output = self._run_command_with_retry(
-                ['wg', 'show'],
-                timeout=self.timeout_wg_show
-            )
-            
-            if not success:
-                self.logger.warning('Не удалось получить информацию о подключениях')
-                return None
+            if snapshot is None:
+                snapshot = self.snapshot()
+                if snapshot is None:
+                    # Состояние неизвестно - не оставляем устаревшее значение
+                    self._active_profile = None
+                    return None
             
-            # Парсим вывод wg show
-            lines = output.strip().split('\n')
-            for line in lines:
-                if 'interface:' in line.lower():
-                    # Пример: interface: wg0
-                    interface = line.split(':')[1].strip()
-                    # Преобразуем имя интерфейса в имя профиля
-                    for profile in self.profiles:
-                        if profile.lower() in interface.lower():
-                            self._active_profile = profile
-                            return profile
+            for interface in snapshot:
+                # Преобразуем имя интерфейса в имя профиля
+                profile = self._profile_for_interface(interface)
+                if profile is not None:
+                    self._active_profile = profile
+                    return profile
             
             self._active_profile = None
             return None
     
-    def get_profile_status(self, profile_name: str) -> ProfileStatus:
+    def get_profile_status(self, profile_name: str,
+                           snapshot: Optional[Dict[str, Dict[str, Any]]] = None) -> ProfileStatus:
         """
         Получить статус профиля
         
         Args:
             profile_name: Имя профиля
+            snapshot: Снимок состояния интерфейсов (None = получить через snapshot())
         
         Returns:
             Статус профиля
         """
-        active = self.get_active_profile()
-        if active == profile_name:
-            return ProfileStatus.ACTIVE
-        
-        # Проверяем, существует ли профиль
+        # Дешевая проверка файла выполняется до запроса к wg
         if not self.check_profile_exists(profile_name):
             return ProfileStatus.ERROR
         
+        active = self.get_active_profile(snapshot)
+        if active == profile_name:
+            return ProfileStatus.ACTIVE
+        
         return ProfileStatus.INACTIVE
     
     def get_all_profiles_info(self) -> Dict[str, ProfileInfo]:
@@ -320,9 +613,23 @@ class WireGuardManager:
         """
         with Timer('Получение информации обо всех профилях', self.logger):
             result = {}
+            snapshot = self.snapshot() or {}
+            
+            # Разбираем снимок один раз для всех профилей
+            active = self.get_active_profile(snapshot)
+            interface_by_profile: Dict[str, str] = {}
+            for interface in snapshot:
+                profile = self._profile_for_interface(interface)
+                if profile is not None:
+                    interface_by_profile.setdefault(profile, interface)
             
             for profile in self.profiles:
-                status = self.get_profile_status(profile)
+                if not self.check_profile_exists(profile):
+                    status = ProfileStatus.ERROR
+                elif profile == active:
+                    status = ProfileStatus.ACTIVE
+                else:
+                    status = ProfileStatus.INACTIVE
                 config_path = self.config_dir / f'{profile}.conf'
                 
                 info = ProfileInfo(
@@ -331,58 +638,25 @@ class WireGuardManager:
                     config_path=config_path
                 )
                 
-                # Если профиль активен, получаем дополнительную информацию
-                if status == ProfileStatus.ACTIVE:
-                    success, output = self._run_command_with_retry(
-                        ['wg', 'show'],
-                        timeout=self.timeout_wg_show
-                    )
-                    
-                    if success:
-                        # Парсим статистику (упрощенная версия)
-                        lines = output.strip().split('\n')
-                        for i, line in enumerate(lines):
-                            if 'transfer:' in line.lower():
-                                # Пример: transfer: 1.23 MiB received, 456.78 KiB sent
-                                parts = line.split(':')[1].strip().split(',')
-                                if len(parts) >= 2:
-                                    rx_part = parts[0].strip()
-                                    tx_part = parts[1].strip()
-                                    
-                                    # Парсим значения (упрощенно)
-                                    if 'received' in rx_part:
-                                        rx_value = rx_part.split()[0]
-                                        info.transfer_rx = self._parse_transfer(rx_value)
-                                    if 'sent' in tx_part:
-                                        tx_value = tx_part.split()[0]
-                                        info.transfer_tx = self._parse_transfer(tx_value)
+                # Если профиль активен, заполняем статистику из снимка
+                interface = interface_by_profile.get(profile)
+                if status == ProfileStatus.ACTIVE and interface is not None:
+                    data = snapshot[interface]
+                    info.interface_name = interface
+                    info.public_key = data['public_key']
+                    info.endpoint = data['endpoint']
+                    info.transfer_rx = data['transfer_rx']
+                    info.transfer_tx = data['transfer_tx']
+                    if data['last_handshake']:
+                        info.last_handshake = datetime.fromtimestamp(
+                            data['last_handshake']
+                        ).strftime('%Y-%m-%d %H:%M:%S')
                 
                 result[profile] = info
             
             self._profiles_cache = result
             return result
     
-    def _parse_transfer(self, value_str: str) -> int:
-        """Парсит строку с размером передачи в байты"""
-        try:
-            value_str = value_str.lower()
-            if 'kib' in value_str:
-                return int(float(value_str.replace('kib', '').strip()) * 1024)
-            elif 'mib' in value_str:
-                return int(float(value_str.replace('mib', '').strip()) * 1024 * 1024)
-            elif 'gib' in value_str:
-                return int(float(value_str.replace('gib', '').strip()) * 1024 * 1024 * 1024)
-            elif 'kb' in value_str:
-                return int(float(value_str.replace('kb', '').strip()) * 1000)
-            elif 'mb' in value_str:
-                return int(float(value_str.replace('mb', '').strip()) * 1000 * 1000)
-            elif 'gb' in value_str:
-                return int(float(value_str.replace('gb', '').strip()) * 1000 * 1000 * 1000)
-            else:
-                return int(float(value_str))
-        except:
-            return 0
-    
     def turn_off_all(self) -> Tuple[bool, str]:
         """
         Отключить все профили
@@ -390,15 +664,31 @@ class WireGuardManager:
         Returns:
             Кортеж (успех, сообщение)
         """
-        self.logger.info('Отключение всех профилей (последовательность: App → bomBox → usa)')
-        
         operations = []
-        for profile in ['App', 'bomBox', 'usa']:
-            success, message = self._deactivate_profile(profile)
-            operations.append((profile, success, message))
+        with self._lock:
+            # Отключаем все поднятые интерфейсы (по свежему снимку): wg-quick
+            # называет интерфейс по имени конфигурации, поэтому интерфейс вне
+            # списка профилей отключается по своему имени. Если снимок
+            # получить не удалось - все профили из конфигурации
+            self.invalidate_snapshot()
+            snapshot = self.snapshot()
+            if snapshot is None:
+                profiles = list(self.profiles)
+            else:
+                profiles = list(dict.fromkeys(
+                    self._profile_for_interface(interface) or interface
+                    for interface in snapshot
+                ))
+            self.logger.info(f'Отключение всех профилей (последовательность: {" → ".join(profiles) or "нет"})')
             
-            if not success:
-                self.logger.warning(f'Не удалось отключить профиль {profile}: {message}')
+            # По одному: параллельные pkexec запрашивают пароль каждый отдельно,
+            # а wg-quick down одновременно меняют DNS и правила firewall
+            for profile in profiles:
+                success, message = self._deactivate_profile(profile)
+                operations.append((profile, success, message))
+                
+                if not success:
+                    self.logger.warning(f'Не удалось отключить профиль {profile}: {message}')
         
         # Проверяем результаты
         failed = [op for op in operations if not op[1]]
@@ -430,7 +720,7 @@ class WireGuardManager:
             if not valid:
                 return False, f'Профиль {profile_name} невалиден: {msg}'
             
-            # Проверка, не активен ли уже этот профиль
+            # Проверка, не активен ли уже этот профиль (снимок из кэша, если свежий)
             current_status = self.get_profile_status(profile_name)
             if current_status == ProfileStatus.ACTIVE:
                 self.logger.warning(f'Профиль {profile_name} уже активен')
@@ -438,15 +728,18 @@ class WireGuardManager:
             
             self.logger.info(f'Активация профиля {profile_name}...')
             
-            # Определяем порядок отключения
+            # Определяем все поднятые интерфейсы других профилей
+            snapshot = self.snapshot() or {}
             profiles_to_deactivate = []
-            for profile in self.profiles:
-                if profile != profile_name:
-                    current = self.get_profile_status(profile)
-                    if current == ProfileStatus.ACTIVE:
-                        profiles_to_deactivate.append(profile)
+            for interface in snapshot:
+                profile = self._profile_for_interface(interface)
+                if profile is not None and profile != profile_name \
+                        and profile not in profiles_to_deactivate:
+                    profiles_to_deactivate.append(profile)
             
-            # Отключаем другие профили
+            # Отключаем другие профили по одному: параллельные pkexec
+            # запрашивают пароль каждый отдельно, а wg-quick down
+            # одновременно меняют DNS и правила firewall
             for profile in profiles_to_deactivate:
                 self.logger.debug(f'Отключение профиля {profile} перед активацией {profile_name}')
                 success, msg = self._deactivate_profile(profile)
@@ -467,29 +760,53 @@ class WireGuardManager:
     def _activate_profile(self, profile_name: str) -> Tuple[bool, str]:
         """Внутренний метод активации профиля"""
         command = ['wg-quick', 'up', profile_name]
-        return self._run_command_with_retry(command, timeout=self.timeout_wg_quick)
+        try:
+            return self._run_command_with_retry(command, timeout=self.timeout_wg_quick)
+        finally:
+            self._invalidate_cache(profile_name)
     
     def _deactivate_profile(self, profile_name: str) -> Tuple[bool, str]:
         """Внутренний метод деактивации профиля"""
         command = ['wg-quick', 'down', profile_name]
-        return self._run_command_with_retry(command, timeout=self.timeout_wg_quick)
+        try:
+            # Вызывающим нужен только код возврата (и stderr при ошибке)
+            return self._run_command_with_retry(
+                command,
+                timeout=self.timeout_wg_quick,
+                decode_output=False
+            )
+        finally:
+            self._invalidate_cache(profile_name)
     
-    def get_wg_show_output(self) -> str:
+    def _invalidate_cache(self, profile_name: str) -> None:
+        """Сбросить кэшированные проверки профиля и снимок интерфейсов"""
+        # После up/down состояние профиля известно только по новому снимку
+        if self._active_profile == profile_name:
+            self._active_profile = None
+        self._validation_cache.pop(profile_name, None)
+        self._clear_command_cache()
+        self.invalidate_snapshot()
+    
+    def get_wg_show_output(self, force: bool = False) -> str:
         """
         Получить вывод команды wg show
         
+        Args:
+            force: Игнорировать кэш и выполнить команду
+        
         Returns:
             Вывод команды или сообщение об ошибке
         """
-        success, output = self._run_command_with_retry(
+        success, output = self._run_cached_command(
             ['wg', 'show'],
-            timeout=self.timeout_wg_show
+            timeout=self.timeout_wg_show,
+            force=force
         )
         
         if success:
             return output.strip()
         else:
-            return f'Ошибка получения статуса: {output}'
+            return f'{_WG_SHOW_ERROR_PREFIX} {output}'
     
     def check_system_ready(self) -> Tuple[bool, str]:
         """
@@ -503,7 +820,7 @@ class WireGuardManager:
         # Проверка наличия команд
         required_commands = ['wg', 'wg-quick', 'pkexec']
         for cmd in required_commands:
-            if shutil.which(cmd) is None:
+            if self._which(cmd) is None:
                 checks.append(f'Команда {cmd} не найдена')
         
         # Проверка директории конфигураций
@@ -514,8 +831,8 @@ class WireGuardManager:
             self.logger.debug(f'Нет прав на чтение директории: {self.config_dir}')
             # Не добавляем в checks, чтобы не показывать предупреждение пользователю
         
-        # Проверка хотя бы одного профиля
-        profiles_exist = any(self.check_profile_exists(p) for p in self.profiles)
+        # Проверка хотя бы одного профиля (профили из конфигурации считаются существующими)
+        profiles_exist = bool(self.profiles) or bool(self._list_confs())
         if not profiles_exist:
             checks.append('Не найден ни один профиль WireGuard')
         
@@ -527,6 +844,26 @@ class WireGuardManager:
         self.logger.debug('Система готова к работе')
         return True, 'Система готова'
     
+    def _which(self, cmd: str) -> Optional[str]:
+        """
+        Найти команду в PATH с кэшированием
+        
+        Кэшируются только найденные пути, чтобы установка недостающей
+        команды была замечена при следующей проверке.
+        
+        Args:
+            cmd: Имя команды
+        
+        Returns:
+            Полный путь к команде или None
+        """
+        path = self._which_cache.get(cmd)
+        if path is None:
+            path = shutil.which(cmd)
+            if path is not None:
+                self._which_cache[cmd] = path
+        return path
+    
     def refresh_cache(self) -> None:
         """Обновить кэш профилей"""
         with Timer('Обновление кэша профилей', self.logger):
@@ -535,19 +872,28 @@ class WireGuardManager:
 
 # Глобальный экземпляр менеджера
 _manager_instance: Optional[WireGuardManager] = None
+_manager_lock = threading.Lock()
 
 
 def get_manager() -> WireGuardManager:
     """
     Получить глобальный экземпляр менеджера
     
+    Потокобезопасен: блокировка берется только при первом создании
+    экземпляра (double-checked locking).
+    
     Returns:
         Экземпляр WireGuardManager
     """
     global _manager_instance
-    if _manager_instance is None:
-        _manager_instance = WireGuardManager()
-    return _manager_instance
+    instance = _manager_instance
+    if instance is not None:
+        return instance
+    
+    with _manager_lock:
+        if _manager_instance is None:
+            _manager_instance = WireGuardManager()
+        return _manager_instance
 
 
 __all__ = [
@@ -5,14 +5,53 @@
 
 import os
 import sys
+import atexit
+import queue
+import time
+import functools
 import logging
 import logging.handlers
 from pathlib import Path
-from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Tuple
 
 
-class ColoredFormatter(logging.Formatter):
+# Допустимые уровни логирования
+_LEVELS: Dict[str, int] = {
+    'DEBUG': logging.DEBUG,
+    'INFO': logging.INFO,
+    'WARNING': logging.WARNING,
+    'ERROR': logging.ERROR,
+    'CRITICAL': logging.CRITICAL,
+}
+
+
+class CachedTimeFormatter(logging.Formatter):
+    """
+    Форматировщик, кэширующий строку времени в пределах одной секунды
+    
+    При заданном datefmt с точностью до секунды все записи одной секунды
+    получают одинаковую метку времени, поэтому strftime вызывается не
+    чаще раза в секунду.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._time_cache = (-1, '')
+    
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        if datefmt is None:
+            return super().formatTime(record, datefmt)
+        
+        sec = int(record.created)
+        cached_sec, cached = self._time_cache
+        if sec == cached_sec:
+            return cached
+        formatted = super().formatTime(record, datefmt)
+        self._time_cache = (sec, formatted)
+        return formatted
+
+
+class ColoredFormatter(CachedTimeFormatter):
     """Форматировщик логов с цветами для консоли"""
     
     COLORS = {
@@ -24,25 +63,38 @@ class ColoredFormatter(logging.Formatter):
     }
     RESET = '\033[0m'
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Терминал не меняется за время работы, проверяем один раз
+        # (stderr может отсутствовать, например под pythonw)
+        self._is_tty = sys.stderr is not None and sys.stderr.isatty()
+        # Цвет по числовому уровню, чтобы не искать по имени уровня
+        self._prefix = {
+            _LEVELS[name]: color for name, color in self.COLORS.items()
+        }
+    
     def format(self, record: logging.LogRecord) -> str:
         """Форматирует запись лога с цветами для консоли"""
         # Создаем базовую форматированную строку
         formatted = super().format(record)
         
         # Добавляем цвета только если вывод в консоль
-        if sys.stderr.isatty() and getattr(record, 'use_color', False):
-            level_color = self.COLORS.get(record.levelname, '')
-            return f"{level_color}{formatted}{self.RESET}"
+        if self._is_tty:
+            return self._prefix.get(record.levelno, '') + formatted + self.RESET
         return formatted
 
 
 class ContextFilter(logging.Filter):
     """Фильтр для добавления контекстной информации в логи"""
     
+    # Пользователь и хост не меняются за время жизни процесса
+    _user = os.environ.get('USER', 'unknown')
+    _hostname = os.uname().nodename if hasattr(os, 'uname') else 'unknown'
+    
     def filter(self, record: logging.LogRecord) -> bool:
         # Добавляем информацию о пользователе и хосте
-        record.user = os.environ.get('USER', 'unknown')
-        record.hostname = os.uname().nodename if hasattr(os, 'uname') else 'unknown'
+        record.user = self._user
+        record.hostname = self._hostname
         
         # Добавляем время выполнения (будет установлено позже)
         if not hasattr(record, 'execution_time'):
@@ -51,6 +103,148 @@ class ContextFilter(logging.Filter):
         return True
 
 
+# Поля записи, которые заполняет ContextFilter
+_CONTEXT_FIELDS = ('%(user)', '%(hostname)', '%(execution_time)')
+
+
+def _uses_context_fields(*formatters: logging.Formatter) -> bool:
+    """Проверить, ссылается ли хотя бы один формат на поля ContextFilter"""
+    return any(
+        field in (formatter._fmt or '')
+        for formatter in formatters
+        for field in _CONTEXT_FIELDS
+    )
+
+
+class StderrHandler(logging.Handler):
+    """
+    Обработчик вывода в stderr напрямую через os.write
+    
+    Запись кодируется один раз и уходит одним системным вызовом, минуя
+    буферизацию и блокировки TextIOWrapper у sys.stderr.
+    """
+    
+    def __init__(self, fd: int = 2):
+        super().__init__()
+        self.fd = fd
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            data = (self.format(record) + '\n').encode('utf-8', 'replace')
+            while data:
+                written = os.write(self.fd, data)
+                data = data[written:]
+        except Exception:
+            self.handleError(record)
+
+
+class MaxLevelFilter(logging.Filter):
+    """Фильтр, пропускающий только записи ниже заданного уровня"""
+    
+    def __init__(self, max_level: int):
+        super().__init__()
+        self.max_level = max_level
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno < self.max_level
+
+
+class CachedSizeRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    RotatingFileHandler, который сам считает размер файла
+    
+    Стандартный shouldRollover на каждую запись делает seek/tell и
+    проверки os.path.exists/isfile. Здесь размер берется через fstat
+    один раз при открытии файла и дальше накапливается по записям.
+    """
+    
+    # Сбрасывать буфер файла после каждой записи (отключается на время
+    # пакетной записи из BatchingQueueListener)
+    _autoflush = True
+    
+    def flush(self) -> None:
+        if self._autoflush:
+            super().flush()
+    
+    def _open(self):
+        stream = super()._open()
+        self._size = os.fstat(stream.fileno()).st_size
+        return stream
+    
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.stream is None:
+            self.stream = self._open()
+        if self.maxBytes <= 0:
+            return False
+        
+        msg = self.format(record) + self.terminator
+        size = len(msg.encode(self.encoding or 'utf-8', 'replace'))
+        if self._size + size >= self.maxBytes:
+            return True
+        self._size += size
+        return False
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """
+    QueueListener, записывающий накопившиеся записи пачкой
+    
+    После каждой полученной записи забирает из очереди все остальные,
+    передает их обработчикам без сброса файлов и сбрасывает файлы один
+    раз на пачку. Записи не задерживаются: пачка - это то, что успело
+    накопиться, пока писалась предыдущая.
+    """
+    
+    def _monitor(self) -> None:
+        q = self.queue
+        has_task_done = hasattr(q, 'task_done')
+        # Обработчики, поддерживающие отложенный сброс
+        batching = [h for h in self.handlers if hasattr(h, '_autoflush')]
+        stop = False
+        while not stop:
+            records = [self.dequeue(True)]
+            while True:
+                try:
+                    records.append(self.dequeue(False))
+                except queue.Empty:
+                    break
+            
+            for handler in batching:
+                handler._autoflush = False
+            try:
+                for record in records:
+                    if record is self._sentinel:
+                        stop = True
+                    else:
+                        self.handle(record)
+            finally:
+                for handler in batching:
+                    handler._autoflush = True
+                    handler.flush()
+            
+            if has_task_done:
+                for _ in records:
+                    q.task_done()
+
+
+# Фоновый поток, записывающий логи в файлы
+_queue_listener: Optional[BatchingQueueListener] = None
+
+
+def _stop_queue_listener() -> None:
+    """Остановить фоновую запись логов, дописав оставшиеся записи"""
+    global _queue_listener
+    if _queue_listener is None:
+        return
+    _queue_listener.stop()
+    for handler in _queue_listener.handlers:
+        handler.close()
+    _queue_listener = None
+
+
+atexit.register(_stop_queue_listener)
+
+
 def setup_logging(
     level: str = 'INFO',
     console: bool = True,
@@ -63,7 +257,17 @@ def setup_logging(
         level: Уровень логирования (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         console: Включить вывод в консоль
         log_dir: Директория для логов (по умолчанию ~/.local/share/wg-manager/)
+    
+    Raises:
+        ValueError: Если указан неизвестный уровень логирования
     """
+    level_no = _LEVELS.get(level.upper())
+    if level_no is None:
+        raise ValueError(
+            f'Неизвестный уровень логирования: {level!r} '
+            f'(допустимы: {", ".join(_LEVELS)})'
+        )
+    
     log_dir_path: Path
     if log_dir is None:
         log_dir_path = Path.home() / '.local' / 'share' / 'wg-manager'
@@ -79,17 +283,14 @@ def setup_logging(
     
     # Настраиваем корневой логгер
     root_logger = logging.getLogger()
-    root_logger.setLevel(getattr(logging, level))
+    root_logger.setLevel(level_no)
     
     # Очищаем существующие обработчики
     root_logger.handlers.clear()
-    
-    # Добавляем фильтр контекста
-    context_filter = ContextFilter()
-    root_logger.addFilter(context_filter)
+    _stop_queue_listener()
     
     # Форматтеры
-    file_formatter = logging.Formatter(
+    file_formatter = CachedTimeFormatter(
         '[%(asctime)s] [%(levelname)s] [%(module)s:%(lineno)d] %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S'
     )
@@ -100,55 +301,75 @@ def setup_logging(
     )
     
     # Обработчик для основного файла логов (ротация по размеру и времени)
-    main_handler = logging.handlers.RotatingFileHandler(
+    main_handler = CachedSizeRotatingFileHandler(
         main_log,
         maxBytes=10 * 1024 * 1024,  # 10 МБ
         backupCount=7,              # 7 дней (файлов)
-        encoding='utf-8'
+        encoding='utf-8',
+        delay=True                  # файл открывается при первой записи
     )
-    main_handler.setLevel(getattr(logging, level))
+    main_handler.setLevel(level_no)
     main_handler.setFormatter(file_formatter)
-    main_handler.addFilter(lambda record: record.levelno < logging.ERROR)
-    root_logger.addHandler(main_handler)
+    main_handler.addFilter(MaxLevelFilter(logging.ERROR))
     
     # Обработчик для ошибок (только ERROR и CRITICAL)
-    error_handler = logging.handlers.RotatingFileHandler(
+    error_handler = CachedSizeRotatingFileHandler(
         error_log,
         maxBytes=5 * 1024 * 1024,   # 5 МБ
         backupCount=30,             # 30 дней
-        encoding='utf-8'
+        encoding='utf-8',
+        delay=True
     )
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(file_formatter)
-    root_logger.addHandler(error_handler)
     
-    # Обработчик для консоли (только если console=True)
-    if console:
-        console_handler = logging.StreamHandler(sys.stderr)
-        console_handler.setLevel(getattr(logging, level))
+    handlers = [main_handler, error_handler]
+    
+    # Обработчик для консоли (только если console=True и stderr открыт)
+    if console and sys.stderr is not None:
+        # Подмененный stderr (IDE, перехват вывода) может не иметь дескриптора
+        try:
+            console_handler = StderrHandler(sys.stderr.fileno())
+        except (AttributeError, OSError, ValueError):
+            console_handler = logging.StreamHandler(sys.stderr)
+        console_handler.setLevel(level_no)
         console_handler.setFormatter(console_formatter)
-        
-        # Добавляем атрибут use_color для цветного вывода
-        def add_color_attribute(record):
-            record.use_color = True
-            return True
-        
-        console_handler.addFilter(add_color_attribute)
-        root_logger.addHandler(console_handler)
+        handlers.append(console_handler)
+    
+    # Вывод выполняется в фоновом потоке пачками, логгер только ставит
+    # записи в очередь. Контекст добавляется на стороне вызывающего
+    # потока и только если его поля используются в форматах.
+    global _queue_listener
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    if _uses_context_fields(file_formatter, console_formatter):
+        queue_handler.addFilter(ContextFilter())
+    root_logger.addHandler(queue_handler)
+    _queue_listener = BatchingQueueListener(
+        log_queue,
+        *handlers,
+        respect_handler_level=True
+    )
+    _queue_listener.start()
     
     # Логирование информации о запуске
     logger = get_logger(__name__)
-    logger.info('=' * 60)
-    logger.info(f'Настройка логирования завершена (уровень: {level})')
-    logger.info(f'Основной лог: {main_log}')
-    logger.info(f'Лог ошибок: {error_log}')
-    logger.info('=' * 60)
+    separator = '=' * 60
+    logger.info(
+        '%s\nНастройка логирования завершена (уровень: %s)\n'
+        'Основной лог: %s\nЛог ошибок: %s\n%s',
+        separator, level, main_log, error_log, separator
+    )
 
 
+@functools.lru_cache(maxsize=128)
 def get_logger(name: str) -> logging.Logger:
     """
     Получить логгер с заданным именем
     
+    Результат кэшируется, чтобы повторные вызовы не брали блокировку
+    logging.Manager.
+    
     Args:
         name: Имя логгера (обычно __name__)
     
@@ -164,29 +385,135 @@ class Timer:
     def __init__(self, operation: str, logger: Optional[logging.Logger] = None):
         self.operation = operation
         self.logger = logger or get_logger(__name__)
-        self.start_time: Optional[datetime] = None
+        self.start_time: Optional[int] = None  # perf_counter_ns()
+        self._debug = self.logger.isEnabledFor(logging.DEBUG)
     
     def __enter__(self):
-        self.start_time = datetime.now()
-        self.logger.debug(f'Начало операции: {self.operation}')
+        self.start_time = time.perf_counter_ns()
+        if self._debug:
+            self.logger.debug('Начало операции: %s', self.operation)
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.start_time:
-            elapsed = (datetime.now() - self.start_time).total_seconds() * 1000
+        if self.start_time is not None:
+            elapsed = (time.perf_counter_ns() - self.start_time) / 1_000_000
             if exc_type is None:
-                self.logger.debug(f'Операция завершена: {self.operation} ({elapsed:.2f} мс)')
+                if self._debug:
+                    self.logger.debug('Операция завершена: %s (%.2f мс)', self.operation, elapsed)
             else:
                 self.logger.error(
-                    f'Операция завершена с ошибкой: {self.operation} '
-                    f'({elapsed:.2f} мс): {exc_val}'
+                    'Операция завершена с ошибкой: %s (%.2f мс): %s',
+                    self.operation, elapsed, exc_val
                 )
     
     def get_elapsed_ms(self) -> float:
         """Получить прошедшее время в миллисекундах"""
-        if not self.start_time:
+        if self.start_time is None:
             return 0.0
-        return (datetime.now() - self.start_time).total_seconds() * 1000
+        return (time.perf_counter_ns() - self.start_time) / 1_000_000
+
+
+def _tail_offset(f, n: int, block_size: int = 8192) -> Tuple[int, int]:
+    """
+    Найти смещение, с которого начинаются последние строки файла,
+    читая его блоками с конца
+    
+    Args:
+        f: Файл, открытый в двоичном режиме
+        n: Количество строк
+        block_size: Размер блока чтения в байтах
+    
+    Returns:
+        Кортеж (смещение в байтах, количество строк от смещения до конца)
+    """
+    end = f.seek(0, os.SEEK_END)
+    if n <= 0 or end == 0:
+        return end, 0
+    
+    # Перевод строки в самом конце файла не начинает новую строку
+    f.seek(end - 1)
+    pos = end - 1 if f.read(1) == b'\n' else end
+    remaining = n
+    while pos > 0:
+        read_size = min(block_size, pos)
+        pos -= read_size
+        f.seek(pos)
+        block = f.read(read_size)
+        idx = len(block)
+        while True:
+            idx = block.rfind(b'\n', 0, idx)
+            if idx < 0:
+                break
+            remaining -= 1
+            if remaining == 0:
+                return pos + idx + 1, n
+    
+    # Файл короче n строк - экспортируем целиком
+    return 0, n - remaining + 1
+
+
+def _copy_range(
+    src,
+    dst,
+    offset: int,
+    count: int,
+    buffer_size: int = 64 * 1024
+) -> None:
+    """
+    Скопировать участок файла src в dst, по возможности без копирования
+    данных через Python (os.sendfile)
+    
+    Args:
+        src: Исходный файл, открытый в двоичном режиме
+        dst: Целевой файл, открытый в двоичном режиме
+        offset: Смещение начала участка в src
+        count: Размер участка в байтах
+        buffer_size: Размер буфера для копирования без sendfile
+    """
+    dst.flush()
+    sent = 0
+    if hasattr(os, 'sendfile'):
+        try:
+            while sent < count:
+                n = os.sendfile(dst.fileno(), src.fileno(), offset + sent, count - sent)
+                if n == 0:
+                    break
+                sent += n
+            return
+        except OSError:
+            # sendfile поддерживается не для всех файловых систем
+            if sent:
+                raise
+    
+    # Копирование через один переиспользуемый буфер
+    src.seek(offset + sent)
+    remaining = count - sent
+    buf = bytearray(min(buffer_size, remaining))
+    view = memoryview(buf)
+    while remaining > 0:
+        n = src.readinto(view[:min(len(buf), remaining)])
+        if not n:
+            break
+        dst.write(view[:n])
+        remaining -= n
+
+
+def read_log_tail(path: Path, lines: int) -> str:
+    """
+    Прочитать последние строки файла лога, не читая файл целиком
+    
+    Args:
+        path: Путь к файлу лога
+        lines: Количество строк
+    
+    Returns:
+        Текст последних строк
+    """
+    with open(path, 'rb') as f:
+        offset, _ = _tail_offset(f, lines)
+        f.seek(offset)
+        data = f.read()
+    return data.decode('utf-8', 'replace')
 
 
 def export_logs(output_path: str, lines: int = 1000) -> bool:
@@ -207,29 +534,28 @@ def export_logs(output_path: str, lines: int = 1000) -> bool:
         if not main_log.exists():
             return False
         
-        # Читаем последние строки из лога
-        with open(main_log, 'r', encoding='utf-8') as f:
-            all_lines = f.readlines()
-        
-        last_lines = all_lines[-lines:] if len(all_lines) > lines else all_lines
-        
-        # Записываем в выходной файл
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(f'Экспорт логов WireGuard Manager\n')
-            f.write(f'Время экспорта: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}\n')
-            f.write(f'Всего строк в логе: {len(all_lines)}\n')
-            f.write(f'Экспортировано строк: {len(last_lines)}\n')
-            f.write('=' * 80 + '\n')
-            f.writelines(last_lines)
+        # Копируем хвост лога как есть, без декодирования строк
+        with open(main_log, 'rb') as src, open(output_path, 'wb') as dst:
+            log_size = os.fstat(src.fileno()).st_size
+            offset, exported = _tail_offset(src, lines)
+            header = (
+                f'Экспорт логов WireGuard Manager\n'
+                f'Время экспорта: {time.strftime("%Y-%m-%d %H:%M:%S")}\n'
+                f'Размер лога: {log_size} байт\n'
+                f'Экспортировано строк: {exported}\n'
+                + '=' * 80 + '\n'
+            )
+            dst.write(header.encode('utf-8'))
+            _copy_range(src, dst, offset, log_size - offset)
         
         logger = get_logger(__name__)
-        logger.info(f'Логи экспортированы в {output_path} ({len(last_lines)} строк)')
+        logger.info('Логи экспортированы в %s (%d строк)', output_path, exported)
         return True
     except Exception as e:
         logger = get_logger(__name__)
-        logger.error(f'Ошибка при экспорте логов: {e}')
+        logger.error('Ошибка при экспорте логов: %s', e)
         return False
 
 
 # Инициализация модуля
-__all__ = ['setup_logging', 'get_logger', 'Timer', 'export_logs']
\ No newline at end of file
+__all__ = ['setup_logging', 'get_logger', 'Timer', 'export_logs', 'read_log_tail']
\ No newline at end of file
@@ -3,19 +3,118 @@ GUI компоненты WireGuard Manager
 Интерфейс на GTK 3 с поддержкой темной темы и анимациями
 """
 
-import gi
-gi.require_version('Gtk', '3.0')
-gi.require_version('GLib', '2.0')
+from ._gtk_boot import ensure_gtk
+ensure_gtk()
 
 from gi.repository import Gtk, GLib, Gdk, Pango
+import re
+import queue
+import functools
 import threading
 import time
-from typing import Dict, Any, Optional, List
+from collections import deque
+from typing import Dict, Any, Optional, List, Set, Tuple
 from pathlib import Path
 from datetime import datetime
 
-from .core import get_manager, ProfileStatus, ProfileInfo
-from .logger import get_logger, export_logs
+from .core import (
+    get_manager, ProfileStatus, ProfileInfo,
+    _AUTH_ERR_RE, _NOTFOUND_RE, _WG_SHOW_ERROR_PREFIX
+)
+from .logger import get_logger, export_logs, read_log_tail
+
+
+# Ключи строк вывода wg show, которые форматируются особо
+_WG_LINE_RE = re.compile(
+    r'^\s*(interface|peer|endpoint|allowed ips|latest handshake|transfer|preshared key)'
+    r'\s*:\s*(.*)$',
+    re.IGNORECASE
+)
+
+
+def _format_wg_transfer(line: str, key: str, value: str) -> List[str]:
+    """Разбить строку transfer на принятые и отправленные данные"""
+    if 'received' in value and 'sent' in value:
+        result = ["  📊 Передача данных:"]
+        # Пытаемся извлечь значения
+        if ',' in value:
+            received, sent = value.split(',', 1)
+            result.append(f"    📥 {received.strip()}")
+            result.append(f"    📤 {sent.strip()}")
+        return result
+    return [f"  {line}"]
+
+
+# Форматирование строки wg show по ее ключу: (строка, ключ, значение) -> строки
+_WG_LINE_FORMATTERS = {
+    'interface': lambda line, key, value: [f"🔌 {line}"],
+    'peer': lambda line, key, value: [f"👤 {line}"],
+    'endpoint': lambda line, key, value: [f"  🌐 {key}: {value}"],
+    'allowed ips': lambda line, key, value: [f"  📡 {line}"],
+    'latest handshake': lambda line, key, value: [f"  🤝 Последнее рукопожатие: {value}"],
+    'transfer': _format_wg_transfer,
+    # Скрываем preshared key
+    'preshared key': lambda line, key, value: ["  🔑 preshared key: (скрыто)"],
+}
+
+
+# Заголовки текста на вкладке "Статус"
+_STATUS_HEADER_FMT = "=== WireGuard Status ===\nОбновлено: {}\n\n"
+_STATUS_WG_SHOW_HEADER = "\n=== wg show output ===\n"
+
+# Имя файла по умолчанию при сохранении логов
+_LOG_NAME_FMT = "wg-manager-logs-{:%Y%m%d-%H%M%S}.txt"
+
+# Иконки уведомлений, загружаемые заранее
+_NOTIFICATION_ICONS = ('document-save', 'dialog-error', 'dialog-warning', 'dialog-information')
+
+
+def _format_profile_status(profile_name: str, info: ProfileInfo) -> str:
+    """Сформировать строки статуса одного профиля для вкладки «Статус»"""
+    active = info.status == ProfileStatus.ACTIVE
+    status_icon = "🟢" if active else "🔴"
+    text = f"{status_icon} {profile_name}: {info.status.value}"
+    
+    if active and (info.transfer_rx > 0 or info.transfer_tx > 0):
+        rx_mb = info.transfer_rx / (1024 * 1024)
+        tx_mb = info.transfer_tx / (1024 * 1024)
+        text += f"\n   📥 Принято: {rx_mb:.2f} МБ\n   📤 Отправлено: {tx_mb:.2f} МБ"
+    return text
+
+
+def _text_diff_bounds(old: str, new: str) -> Tuple[int, int]:
+    """
+    Найти длины общего начала и общего конца двух строк
+    
+    Сравнение идет срезами с двоичным поиском, чтобы не перебирать
+    символы в Python.
+    
+    Args:
+        old: Прежний текст
+        new: Новый текст
+    
+    Returns:
+        Кортеж (длина общего префикса, длина общего суффикса)
+    """
+    limit = min(len(old), len(new))
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old[:mid] == new[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    prefix = lo
+    
+    # Суффикс не должен перекрываться с префиксом
+    lo, hi = 0, limit - prefix
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old[len(old) - mid:] == new[len(new) - mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return prefix, lo
 
 
 class WireGuardManagerApp:
@@ -25,19 +124,86 @@ class WireGuardManagerApp:
         self.logger = get_logger(__name__)
         self.manager = get_manager()
         self.window: Optional[Gtk.Window] = None
-        self._ui_lock = threading.RLock()
-        self._operation_lock = threading.Lock()
-        self._last_click_time = 0
+        # Защищает состояние, которое пишет поток обновления и читает UI
+        self._state_lock = threading.Lock()
+        self._last_click_time = 0  # monotonic_ns()
         self._debounce_delay = 500  # мс
         
+        # Очереди обновлений UI по приоритету; каждая выполняется одним
+        # idle-обработчиком
+        self._pending_ui_ops: Dict[int, deque] = {}
+        self._ui_ops_lock = threading.Lock()
+        self._drain_scheduled: Set[int] = set()
+        
         # Кэш состояния UI
         self._active_profile: Optional[str] = None
         self._profiles_info: Dict[str, ProfileInfo] = {}
         self._status_text: str = ''
         
+        # Последний сырой вывод wg show и результат его форматирования
+        self._wg_format_cache: Tuple[Optional[str], str] = (None, '')
+        
+        # Текст статуса, отложенный до переключения на вкладку "Статус"
+        self._pending_status_text: Optional[str] = None
+        
+        # Диалоги, создаваемые один раз и используемые повторно
+        self._save_log_dialog: Optional[Gtk.FileChooserDialog] = None
+        self._notification_dialog: Optional[Gtk.MessageDialog] = None
+        
+        # Высота экрана для позиционирования диалогов
+        self._screen_height: Optional[int] = None
+        
+        # Последняя разметка индикатора состояния
+        self._last_indicator_markup: Optional[str] = None
+        
+        # Последний текст, показанный в строке состояния
+        self._last_status_bar_text: Optional[str] = None
+        
+        # Отформатированное текущее время по формату: (секунда, строка)
+        self._time_str_cache: Dict[str, Tuple[int, str]] = {}
+        
+        # Текст, находящийся сейчас в текстовых буферах (по ключу буфера)
+        self._buffer_texts: Dict[str, str] = {}
+        
+        # Операции кнопок профилей, связанные с аргументами заранее
+        # (подключаются к сигналу clicked напрямую, кнопка уходит в widget)
+        self._activate_off = functools.partial(self._run_operation, self.manager.turn_off_all, ())
+        self._activate_bombox = functools.partial(self._run_operation, self.manager.activate_profile, ("bomBox",))
+        self._activate_app = functools.partial(self._run_operation, self.manager.activate_profile, ("App",))
+        force_refresh = functools.partial(self._refresh_data, force=True)
+        
+        # Горячие клавиши: (модификатор Ctrl, клавиша) -> обработчик
+        ctrl = Gdk.ModifierType.CONTROL_MASK
+        self._key_handlers: Dict[Tuple[int, int], Any] = {
+            (ctrl, Gdk.KEY_1): self._activate_off,     # Ctrl+1 - OFF
+            (ctrl, Gdk.KEY_2): self._activate_bombox,  # Ctrl+2 - bomBox
+            (ctrl, Gdk.KEY_3): self._activate_app,     # Ctrl+3 - App
+            (0, Gdk.KEY_F5): force_refresh,            # F5 - обновить
+            (ctrl, Gdk.KEY_F5): force_refresh,
+        }
+        
         # Таймер автообновления
         self._refresh_timer_id = None
         self._is_refreshing = False
+        self._refresh_interval = 2.0  # секунды
+        # Окно объединения запросов на обновление
+        self._refresh_debounce_ms = 100
+        self._refresh_pending = False
+        self._refresh_force = False
+        self._logs_refresh_pending = False
+        
+        # Вывод wg show между тиками таймера: (время получения, вывод)
+        self._wg_show_cache: Tuple[float, Optional[str]] = (0.0, None)
+        self._wg_show_ttl = 5.0  # секунды
+        self._min_refresh_delay = 0.2  # секунды
+        # Длительности последних обновлений для подстройки интервала
+        self._refresh_durations: deque = deque(maxlen=30)
+        
+        # Фоновый поток для обновлений и операций: задачи выполняются
+        # по очереди, без создания потока на каждый клик
+        self._worker_queue: queue.Queue = queue.Queue()
+        self._worker = threading.Thread(target=self._worker_loop, name='ui-worker', daemon=True)
+        self._worker.start()
         
         # Инициализация UI
         self._init_ui()
@@ -55,16 +221,24 @@ class WireGuardManagerApp:
         
         # Установка иконки
         try:
-            icon_theme = Gtk.IconTheme.get_default()
-            if icon_theme.has_icon("network-wireless"):
-                icon = icon_theme.load_icon("network-wireless", 48, 0)
+            icon = self._get_app_icon()
+            if icon is not None:
                 self.window.set_icon(icon)
-        except:
-            pass
+        except GLib.Error as e:
+            self.logger.debug(f"Не удалось загрузить иконку: {e}")
+        
+        # Иконки уведомлений подгружаем, когда главный цикл освободится
+        GLib.idle_add(self._preload_icons, priority=GLib.PRIORITY_LOW)
         
         # Подключение обработчиков событий
         self.window.connect("destroy", self._on_destroy)
         self.window.connect("key-press-event", self._on_key_press)
+        self.window.connect("window-state-event", self._on_window_state)
+        
+        # Размеры экрана меняются вместе с набором мониторов или разрешением
+        screen = self.window.get_screen()
+        screen.connect("monitors-changed", self._invalidate_geometry_cache)
+        screen.connect("size-changed", self._invalidate_geometry_cache)
         
         # Создание основного контейнера
         main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
@@ -87,6 +261,8 @@ class WireGuardManagerApp:
         # Вкладка "Логи"
         self._create_logs_tab()
         
+        self.notebook.connect("switch-page", self._on_switch_page)
+        
         # Строка состояния
         self._create_status_bar(main_box)
         
@@ -96,6 +272,31 @@ class WireGuardManagerApp:
         # Настройка темной темы
         self._apply_theme()
     
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _get_app_icon():
+        """
+        Загрузить иконку приложения (один раз за время работы процесса)
+        
+        Returns:
+            GdkPixbuf с иконкой или None, если иконки нет в теме
+        """
+        icon_theme = Gtk.IconTheme.get_default()
+        icon_info = icon_theme.lookup_icon("network-wireless", 48, 0)
+        if icon_info is None:
+            return None
+        return icon_info.load_icon()
+    
+    def _preload_icons(self):
+        """Загрузить иконки уведомлений в кэш темы иконок"""
+        icon_theme = Gtk.IconTheme.get_default()
+        for icon_name in _NOTIFICATION_ICONS:
+            try:
+                icon_theme.load_icon(icon_name, 16, 0)
+            except GLib.Error as e:
+                self.logger.debug(f"Не удалось загрузить иконку {icon_name}: {e}")
+        return False
+    
     def _create_action_panel(self, parent: Gtk.Box):
         """Создать панель действий с кнопками"""
         action_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
@@ -109,24 +310,28 @@ class WireGuardManagerApp:
         # Кнопки профилей
         self.profile_buttons = {}
         
+        # Метки кнопок профилей в обычном и активном состоянии
+        self._default_labels = {'bomBox': "🌍 Bombox", 'App': "📱 App"}
+        self._active_labels = {name: f"✓ {name}" for name in self._default_labels}
+        
         # Кнопка OFF
         off_btn = Gtk.Button.new_with_label("OFF")
         off_btn.set_tooltip_text("Отключить все профили (Ctrl+1)")
-        off_btn.connect("clicked", self._on_off_clicked)
+        off_btn.connect("clicked", self._activate_off)
         self.profile_buttons['OFF'] = off_btn
         action_box.pack_start(off_btn, False, False, 0)
         
         # Кнопка bomBox
-        bombox_btn = Gtk.Button.new_with_label("🌍 Bombox")
+        bombox_btn = Gtk.Button.new_with_label(self._default_labels['bomBox'])
         bombox_btn.set_tooltip_text("Активировать профиль bomBox (Ctrl+2)")
-        bombox_btn.connect("clicked", self._on_bombox_clicked)
+        bombox_btn.connect("clicked", self._activate_bombox)
         self.profile_buttons['bomBox'] = bombox_btn
         action_box.pack_start(bombox_btn, False, False, 0)
         
         # Кнопка App
-        app_btn = Gtk.Button.new_with_label("📱 App")
+        app_btn = Gtk.Button.new_with_label(self._default_labels['App'])
         app_btn.set_tooltip_text("Активировать профиль App (Ctrl+3)")
-        app_btn.connect("clicked", self._on_app_clicked)
+        app_btn.connect("clicked", self._activate_app)
         self.profile_buttons['App'] = app_btn
         action_box.pack_start(app_btn, False, False, 0)
         
@@ -167,7 +372,7 @@ class WireGuardManagerApp:
         scrolled_window.add(self.status_textview)
         status_frame.add(scrolled_window)
         
-        self.notebook.append_page(status_frame, Gtk.Label(label="Статус"))
+        self._status_page_index = self.notebook.append_page(status_frame, Gtk.Label(label="Статус"))
     
     def _create_logs_tab(self):
         """Создать вкладку логов"""
@@ -273,228 +478,331 @@ class WireGuardManagerApp:
         except Exception as e:
             self.logger.debug(f"Не удалось применить тему: {e}")
     
+    def _worker_loop(self):
+        """Цикл фонового потока: выполнять задачи из очереди до получения None"""
+        while True:
+            task = self._worker_queue.get()
+            if task is None:
+                break
+            try:
+                task()
+            except Exception as e:
+                self.logger.error(f"Ошибка в фоновой задаче: {e}")
+    
     def _debounce_click(self) -> bool:
         """Проверка защиты от повторных кликов"""
-        current_time = int(time.time() * 1000)
-        if current_time - self._last_click_time < self._debounce_delay:
+        current_time = time.monotonic_ns()
+        if current_time - self._last_click_time < self._debounce_delay * 1_000_000:
             return False
         self._last_click_time = current_time
         return True
     
     def _set_ui_busy(self, busy: bool):
         """Установить состояние занятости UI"""
-        if self.window is None:
-            self.logger.debug("Окно не существует, пропускаем обновление занятости")
-            return
+        self._queue_ui(self._ui_busy_callback, busy)
+    
+    def _safe_idle_add(self, callback, *args):
+        """
+        Выполнить callback в главном потоке
         
-        try:
-            if not self.window.get_property('visible'):
-                self.logger.debug("Окно не видимо, пропускаем обновление занятости")
-                return
-        except Exception as e:
-            self.logger.debug(f"Ошибка при проверке окна: {e}, пропускаем обновление занятости")
-            return
+        Вызов идет через общую очередь UI: из фоновых потоков в главный
+        цикл попадает один idle-обработчик, а не источник на каждый вызов.
+        Фоновые потоки не должны обращаться к виджетам напрямую.
         
-        try:
-            GLib.idle_add(self._safe_ui_busy_callback, busy)
-        except Exception as e:
-            self.logger.error(f"Ошибка при вызове GLib.idle_add (занятость): {e}")
-    
-    def _safe_ui_busy_callback(self, busy: bool):
-        """Безопасный callback для установки состояния занятости UI"""
-        try:
-            self._ui_busy_callback(busy)
-        except Exception as e:
-            self.logger.error(f"Ошибка в UI callback (занятость): {e}")
+        Используется для уведомлений, поэтому выполняется с обычным
+        приоритетом и не ждет фоновых перерисовок.
+        """
+        self._queue_ui(callback, *args, priority=GLib.PRIORITY_DEFAULT)
     
-    def _safe_idle_add(self, callback, *args):
-        """Безопасный вызов GLib.idle_add с проверкой окна"""
+    def _queue_ui(self, callback, *args, priority: int = GLib.PRIORITY_DEFAULT_IDLE):
+        """
+        Поставить обновление UI в очередь
+        
+        Все обновления с одним приоритетом, накопившиеся до следующей
+        итерации главного цикла, выполняются одним idle-обработчиком.
+        
+        Args:
+            callback: Функция обновления UI
+            *args: Аргументы функции
+            priority: Приоритет idle-обработчика GLib
+        """
         if self.window is None:
             self.logger.debug("Окно не существует, пропускаем обновление UI")
             return
         
-        try:
-            # Проверяем, что окно еще существует и видимо
-            if not self.window.get_property('visible'):
-                self.logger.debug("Окно не видимо, пропускаем обновление UI")
+        with self._ui_ops_lock:
+            self._pending_ui_ops.setdefault(priority, deque()).append((callback, args))
+            if priority in self._drain_scheduled:
                 return
-        except Exception as e:
-            self.logger.debug(f"Ошибка при проверке окна: {e}, пропускаем обновление UI")
-            return
-        
-        def safe_callback(*cb_args):
-            try:
-                callback(*cb_args)
-            except Exception as e:
-                self.logger.error(f"Ошибка в idle_add callback: {e}")
-                return False
-            return False
+            self._drain_scheduled.add(priority)
         
         try:
-            GLib.idle_add(safe_callback, *args)
+            GLib.idle_add(self._drain_ui_ops, priority, priority=priority)
         except Exception as e:
             self.logger.error(f"Ошибка при вызове GLib.idle_add: {e}")
+            with self._ui_ops_lock:
+                self._drain_scheduled.discard(priority)
+    
+    def _drain_ui_ops(self, priority: int):
+        """Выполнить все накопившиеся обновления UI с данным приоритетом (в главном потоке)"""
+        with self._ui_ops_lock:
+            ops = self._pending_ui_ops.pop(priority, ())
+            self._drain_scheduled.discard(priority)
+        
+        if self.window is None or not self.window.get_property('visible'):
+            self.logger.debug("Окно не видимо, пропускаем обновление UI")
+            return False
+        
+        for callback, args in ops:
+            try:
+                callback(*args)
+            except Exception as e:
+                self.logger.error(f"Ошибка в обновлении UI: {e}")
+        return False
     
     def _ui_busy_callback(self, busy: bool):
         """Callback для установки состояния занятости UI"""
-        with self._ui_lock:
-            if busy:
-                self.spinner.start()
-                # Деактивируем кнопки
-                for btn in self.profile_buttons.values():
-                    btn.set_sensitive(False)
-            else:
-                self.spinner.stop()
-                # Активируем кнопки
-                for btn in self.profile_buttons.values():
-                    btn.set_sensitive(True)
+        if busy:
+            self.spinner.start()
+            # Деактивируем кнопки
+            for btn in self.profile_buttons.values():
+                btn.set_sensitive(False)
+        else:
+            self.spinner.stop()
+            # Активируем кнопки
+            for btn in self.profile_buttons.values():
+                btn.set_sensitive(True)
         
         return False
     
+    def _set_buffer_text(self, key: str, textbuffer: Gtk.TextBuffer, text: str) -> bool:
+        """
+        Обновить текстовый буфер, заменяя только изменившийся участок
+        
+        Args:
+            key: Ключ буфера для запоминания его текущего текста
+            textbuffer: Текстовый буфер
+            text: Новый текст
+        
+        Returns:
+            True если текст изменился
+        """
+        old = self._buffer_texts.get(key, '')
+        if text == old:
+            return False
+        
+        prefix, suffix = _text_diff_bounds(old, text)
+        textbuffer.begin_user_action()
+        try:
+            if len(old) - suffix > prefix:
+                textbuffer.delete(
+                    textbuffer.get_iter_at_offset(prefix),
+                    textbuffer.get_iter_at_offset(len(old) - suffix)
+                )
+            if len(text) - suffix > prefix:
+                textbuffer.insert(
+                    textbuffer.get_iter_at_offset(prefix),
+                    text[prefix:len(text) - suffix]
+                )
+        finally:
+            textbuffer.end_user_action()
+        
+        self._buffer_texts[key] = text
+        return True
+    
+    def _format_now(self, fmt: str) -> str:
+        """
+        Отформатировать текущее время, повторно используя строку в
+        пределах одной секунды
+        
+        Args:
+            fmt: Формат time.strftime
+        
+        Returns:
+            Отформатированное время
+        """
+        now = int(time.time())
+        cached = self._time_str_cache.get(fmt)
+        if cached is not None and cached[0] == now:
+            return cached[1]
+        formatted = time.strftime(fmt, time.localtime(now))
+        self._time_str_cache[fmt] = (now, formatted)
+        return formatted
+    
+    def _get_state(self) -> Tuple[Optional[str], Dict[str, ProfileInfo], str]:
+        """
+        Получить согласованный снимок состояния
+        
+        Returns:
+            Кортеж (активный профиль, информация о профилях, вывод wg show)
+        """
+        with self._state_lock:
+            return self._active_profile, self._profiles_info, self._status_text
+    
     def _update_status_indicator(self):
         """Обновить индикатор состояния"""
-        with self._ui_lock:
-            if self._active_profile:
-                markup = f'<span size="x-large" weight="bold">🟢 Активен: {self._active_profile}</span>'
-            else:
-                markup = f'<span size="x-large" weight="bold">🔴 OFF</span>'
-            
-            def update_indicator():
-                try:
-                    self.status_indicator.set_markup(markup)
-                except Exception as e:
-                    self.logger.error(f"Ошибка при обновлении индикатора состояния: {e}")
-            
-            self._safe_idle_add(update_indicator)
+        active_profile, _, _ = self._get_state()
+        if active_profile:
+            markup = f'<span size="x-large" weight="bold">🟢 Активен: {active_profile}</span>'
+        else:
+            markup = f'<span size="x-large" weight="bold">🔴 OFF</span>'
+        
+        def update_indicator():
+            try:
+                # Повторный set_markup заново разбирает разметку
+                if markup == self._last_indicator_markup:
+                    return
+                self.status_indicator.set_markup(markup)
+                self._last_indicator_markup = markup
+            except Exception as e:
+                self.logger.error(f"Ошибка при обновлении индикатора состояния: {e}")
+        
+        self._queue_ui(update_indicator)
     
     def _update_profile_buttons(self):
         """Обновить состояние кнопок профилей"""
-        with self._ui_lock:
-            def update_buttons():
-                try:
-                    for profile_name, button in self.profile_buttons.items():
-                        if profile_name == 'OFF':
-                            continue
-                        
-                        # Получаем информацию о профиле
-                        profile_info = self._profiles_info.get(profile_name)
-                        if not profile_info:
-                            continue
-                        
-                        # Обновляем стиль кнопки
-                        ctx = button.get_style_context()
-                        if profile_info.status == ProfileStatus.ACTIVE:
+        _, profiles_info, _ = self._get_state()
+        
+        def update_buttons():
+            try:
+                for profile_name, button in self.profile_buttons.items():
+                    if profile_name == 'OFF':
+                        continue
+                    
+                    # Получаем информацию о профиле
+                    profile_info = profiles_info.get(profile_name)
+                    if not profile_info:
+                        continue
+                    
+                    # Обновляем стиль и метку кнопки, только если они
+                    # изменились: каждое изменение вызывает перерисовку
+                    active = profile_info.status == ProfileStatus.ACTIVE
+                    ctx = button.get_style_context()
+                    if ctx.has_class("active-profile") != active:
+                        if active:
                             ctx.add_class("active-profile")
-                            button.set_label(f"✓ {profile_name}")
                         else:
                             ctx.remove_class("active-profile")
-                            # Восстанавливаем оригинальную метку
-                            if profile_name == 'bomBox':
-                                button.set_label("🌍 Bombox")
-                            elif profile_name == 'App':
-                                button.set_label("📱 App")
-                except Exception as e:
-                    self.logger.error(f"Ошибка при обновлении кнопок профилей: {e}")
-            
-            self._safe_idle_add(update_buttons)
+                    
+                    labels = self._active_labels if active else self._default_labels
+                    label = labels.get(profile_name)
+                    if label is not None and button.get_label() != label:
+                        button.set_label(label)
+            except Exception as e:
+                self.logger.error(f"Ошибка при обновлении кнопок профилей: {e}")
+        
+        self._queue_ui(update_buttons)
     
     def _update_status_text(self):
         """Обновить текст статуса"""
-        with self._ui_lock:
-            # Формируем текст статуса
-            lines = []
-            lines.append("=== WireGuard Status ===")
-            lines.append(f"Обновлено: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            lines.append("")
-            
-            # Добавляем информацию о профилях
-            for profile_name, info in self._profiles_info.items():
-                status_icon = "🟢" if info.status == ProfileStatus.ACTIVE else "🔴"
-                lines.append(f"{status_icon} {profile_name}: {info.status.value}")
-                
-                if info.status == ProfileStatus.ACTIVE:
-                    if info.transfer_rx > 0 or info.transfer_tx > 0:
-                        rx_mb = info.transfer_rx / (1024 * 1024)
-                        tx_mb = info.transfer_tx / (1024 * 1024)
-                        lines.append(f"   📥 Принято: {rx_mb:.2f} МБ")
-                        lines.append(f"   📤 Отправлено: {tx_mb:.2f} МБ")
-            
-            lines.append("")
-            lines.append("=== wg show output ===")
-            # Форматируем вывод для лучшей читаемости
-            formatted_output = self._format_wg_show_output(self._status_text)
-            lines.append(formatted_output)
-            
-            text = "\n".join(lines)
-            
-            def update_text():
-                try:
-                    textbuffer = self.status_textview.get_buffer()
-                    textbuffer.set_text(text)
-                except Exception as e:
-                    self.logger.error(f"Ошибка при обновлении текста статуса: {e}")
-            
-            self._safe_idle_add(update_text)
+        _, profiles_info, status_text = self._get_state()
+        
+        # Формируем текст статуса
+        profile_block = "\n".join(
+            _format_profile_status(profile_name, info)
+            for profile_name, info in profiles_info.items()
+        )
+        if profile_block:
+            profile_block += "\n"
+        
+        # Форматируем вывод для лучшей читаемости
+        formatted_output = self._format_wg_show_output(status_text)
+        
+        text = (
+            _STATUS_HEADER_FMT.format(self._format_now('%Y-%m-%d %H:%M:%S'))
+            + profile_block
+            + _STATUS_WG_SHOW_HEADER
+            + formatted_output
+        )
+        
+        def update_text():
+            try:
+                # Скрытую вкладку не перерисовываем, текст применится при
+                # переключении на нее
+                if self.notebook.get_current_page() != self._status_page_index:
+                    self._pending_status_text = text
+                    return
+                self._pending_status_text = None
+                textbuffer = self.status_textview.get_buffer()
+                self._set_buffer_text('status', textbuffer, text)
+            except Exception as e:
+                self.logger.error(f"Ошибка при обновлении текста статуса: {e}")
+        
+        # Обновление текста не должно вытеснять обработку ввода
+        self._queue_ui(update_text, priority=GLib.PRIORITY_LOW)
     
-    def _update_logs_text(self):
-        """Обновить текст логов"""
-        lines = int(self.log_lines_spin.get_value())
+    def _update_logs_text(self, lines: int):
+        """
+        Обновить текст логов
+        
+        Читает файл логов, поэтому вызывается из фонового потока;
+        виджеты обновляются через очередь UI.
+        
+        Args:
+            lines: Количество последних строк для отображения
+        """
         log_file = Path.home() / '.local' / 'share' / 'wg-manager' / 'wg-manager.log'
         
         if not log_file.exists():
             text = "Файл логов не найден"
             def update_logs():
                 try:
-                    self.logs_textview.get_buffer().set_text(text)
+                    self._set_buffer_text('logs', self.logs_textview.get_buffer(), text)
                 except Exception as e:
                     self.logger.error(f"Ошибка при обновлении логов: {e}")
-            self._safe_idle_add(update_logs)
+            self._queue_ui(update_logs, priority=GLib.PRIORITY_LOW)
             return
         
         try:
-            with open(log_file, 'r', encoding='utf-8') as f:
-                all_lines = f.readlines()
-            
-            last_lines = all_lines[-lines:] if len(all_lines) > lines else all_lines
-            text = "".join(last_lines)
+            # Читаем только хвост файла
+            text = read_log_tail(log_file, lines)
             
             def update_logs_with_scroll():
                 try:
                     textbuffer = self.logs_textview.get_buffer()
-                    textbuffer.set_text(text)
-                    end_iter = textbuffer.get_end_iter()
-                    self.logs_textview.scroll_to_iter(end_iter, 0.0, False, 0.0, 0.0)
+                    # Прокручиваем к концу, только если пользователь не
+                    # отмотал логи вверх
+                    adj = self.logs_textview.get_vadjustment()
+                    at_bottom = adj.get_value() >= adj.get_upper() - adj.get_page_size() - 1
+                    if self._set_buffer_text('logs', textbuffer, text) and at_bottom:
+                        end_iter = textbuffer.get_end_iter()
+                        self.logs_textview.scroll_to_iter(end_iter, 0.0, False, 0.0, 0.0)
                 except Exception as e:
                     self.logger.error(f"Ошибка при обновлении логов: {e}")
-            self._safe_idle_add(update_logs_with_scroll)
+            self._queue_ui(update_logs_with_scroll, priority=GLib.PRIORITY_LOW)
         except Exception as e:
             self.logger.error(f"Ошибка чтения логов: {e}")
     
     def _update_status_bar(self):
         """Обновить строку состояния"""
-        with self._ui_lock:
-            if self._active_profile:
-                profile_info = self._profiles_info.get(self._active_profile)
-                if profile_info and profile_info.status == ProfileStatus.ACTIVE:
-                    rx_mb = profile_info.transfer_rx / (1024 * 1024) if profile_info.transfer_rx else 0
-                    tx_mb = profile_info.transfer_tx / (1024 * 1024) if profile_info.transfer_tx else 0
-                    status_text = (
-                        f"🟢 Активен: {self._active_profile} | "
-                        f"📶 Передано: {rx_mb:.1f} МБ ↓ / {tx_mb:.1f} МБ ↑ | "
-                        f"⏱️ Обновлено: {datetime.now().strftime('%H:%M:%S')}"
-                    )
-                else:
-                    status_text = f"🔴 Нет активных профилей | ⏱️ {datetime.now().strftime('%H:%M:%S')}"
+        active_profile, profiles_info, _ = self._get_state()
+        if active_profile:
+            profile_info = profiles_info.get(active_profile)
+            if profile_info and profile_info.status == ProfileStatus.ACTIVE:
+                rx_mb = profile_info.transfer_rx / (1024 * 1024) if profile_info.transfer_rx else 0
+                tx_mb = profile_info.transfer_tx / (1024 * 1024) if profile_info.transfer_tx else 0
+                status_text = (
+                    f"🟢 Активен: {active_profile} | "
+                    f"📶 Передано: {rx_mb:.1f} МБ ↓ / {tx_mb:.1f} МБ ↑ | "
+                    f"⏱️ Обновлено: {self._format_now('%H:%M:%S')}"
+                )
             else:
-                status_text = f"🔴 Нет активных профилей | ⏱️ {datetime.now().strftime('%H:%M:%S')}"
-            
-            def update_status_bar():
-                try:
-                    self.status_bar.push(self.status_context_id, status_text)
-                except Exception as e:
-                    self.logger.error(f"Ошибка при обновлении строки состояния: {e}")
-            
-            self._safe_idle_add(update_status_bar)
+                status_text = f"🔴 Нет активных профилей | ⏱️ {self._format_now('%H:%M:%S')}"
+        else:
+            status_text = f"🔴 Нет активных профилей | ⏱️ {self._format_now('%H:%M:%S')}"
+        
+        def update_status_bar():
+            try:
+                if status_text == self._last_status_bar_text:
+                    return
+                # Заменяем сообщение, а не копим их в стеке строки состояния
+                self.status_bar.remove_all(self.status_context_id)
+                self.status_bar.push(self.status_context_id, status_text)
+                self._last_status_bar_text = status_text
+            except Exception as e:
+                self.logger.error(f"Ошибка при обновлении строки состояния: {e}")
+        
+        self._queue_ui(update_status_bar, priority=GLib.PRIORITY_LOW)
      
     def _format_wg_show_output(self, raw_output: str) -> str:
         """
@@ -509,132 +817,145 @@ class WireGuardManagerApp:
         if not raw_output or "Ошибка получения статуса" in raw_output:
             return raw_output
         
-        lines = raw_output.strip().split('\n')
-        formatted_lines = []
+        # Вывод wg show меняется редко, повторно не форматируем
+        cached_raw, cached_text = self._wg_format_cache
+        if raw_output == cached_raw:
+            return cached_text
+        
+        formatted_lines: List[str] = []
+        extend = formatted_lines.extend
+        append = formatted_lines.append
+        match = _WG_LINE_RE.match
         
-        # Парсим вывод
-        current_section = None
-        for line in lines:
+        for line in raw_output.strip().split('\n'):
             line = line.rstrip()
             if not line:
                 continue
             
-            # Определяем секции
-            if 'interface:' in line.lower():
-                formatted_lines.append(f"🔌 {line}")
-                current_section = 'interface'
-            elif 'peer:' in line.lower():
-                formatted_lines.append(f"👤 {line}")
-                current_section = 'peer'
-            elif 'endpoint:' in line.lower():
-                # Форматируем endpoint
-                if ':' in line:
-                    parts = line.split(':', 1)
-                    formatted_lines.append(f"  🌐 {parts[0].strip()}: {parts[1].strip()}")
-                else:
-                    formatted_lines.append(f"  {line}")
-            elif 'allowed ips:' in line.lower():
-                formatted_lines.append(f"  📡 {line}")
-            elif 'latest handshake:' in line.lower():
-                # Извлекаем время handshake
-                if ':' in line:
-                    parts = line.split(':', 1)
-                    time_str = parts[1].strip()
-                    formatted_lines.append(f"  🤝 Последнее рукопожатие: {time_str}")
-                else:
-                    formatted_lines.append(f"  {line}")
-            elif 'transfer:' in line.lower():
-                # Форматируем transfer
-                if ':' in line:
-                    parts = line.split(':', 1)
-                    transfer_info = parts[1].strip()
-                    # Разделяем received и sent
-                    if 'received' in transfer_info and 'sent' in transfer_info:
-                        formatted_lines.append(f"  📊 Передача данных:")
-                        # Пытаемся извлечь значения
-                        if ',' in transfer_info:
-                            received, sent = transfer_info.split(',', 1)
-                            formatted_lines.append(f"    📥 {received.strip()}")
-                            formatted_lines.append(f"    📤 {sent.strip()}")
-                    else:
-                        formatted_lines.append(f"  {line}")
-                else:
-                    formatted_lines.append(f"  {line}")
-            elif 'preshared key:' in line.lower():
-                # Скрываем preshared key
-                formatted_lines.append(f"  🔑 preshared key: (скрыто)")
+            # Одно сопоставление на строку вместо перебора ключевых слов
+            m = match(line)
+            if m:
+                extend(_WG_LINE_FORMATTERS[m.group(1).lower()](line, m.group(1), m.group(2)))
             elif line.startswith('  '):  # Отступы для деталей peer
-                formatted_lines.append(f"  {line}")
+                append(f"  {line}")
             else:
-                formatted_lines.append(line)
+                append(line)
         
         # Если вывод пустой после форматирования, возвращаем оригинал
-        if not formatted_lines:
-            return raw_output
+        text = '\n'.join(formatted_lines) if formatted_lines else raw_output
+        self._wg_format_cache = (raw_output, text)
+        return text
+    
+    def _refresh_data(self, force: bool = False):
+        """
+        Запланировать обновление всех данных
+        
+        Запросы (таймер, F5, кнопка, завершение операции), пришедшие в
+        течение короткого окна, объединяются в одно обновление.
         
-        return '\n'.join(formatted_lines)
+        Args:
+            force: Не использовать кэшированное состояние WireGuard
+        """
+        with self._state_lock:
+            self._refresh_force = self._refresh_force or force
+            if self._refresh_pending:
+                return
+            self._refresh_pending = True
+        
+        GLib.timeout_add(self._refresh_debounce_ms, self._do_refresh_data)
     
-    def _refresh_data(self):
+    def _do_refresh_data(self):
         """Обновить все данные"""
-        with self._ui_lock:
-            # Проверяем, не выполняется ли уже обновление
+        with self._state_lock:
+            self._refresh_pending = False
+            # Не ставим в очередь второе обновление, пока первое не выполнено
             if self._is_refreshing:
-                # Проверяем, не зависло ли обновление
-                if hasattr(self, '_refresh_start_time'):
-                    elapsed = time.time() - self._refresh_start_time
-                    if elapsed > 60:  # 60 секунд - слишком долго
-                        self.logger.warning(f"Обновление зависло ({elapsed:.0f} секунд), сбрасываем состояние")
-                        self._is_refreshing = False
-                    else:
-                        self.logger.debug("Обновление уже выполняется, пропускаем")
-                        return
-                else:
-                    self.logger.debug("Обновление уже выполняется, пропускаем")
-                    return
+                self.logger.debug("Обновление уже запланировано, пропускаем")
+                return False
             
             self._is_refreshing = True
-            self._refresh_start_time = time.time()
-            self._set_ui_busy(True)
-            
-            def refresh_task():
-                try:
-                    # Получаем активный профиль
-                    self._active_profile = self.manager.get_active_profile()
-                    
-                    # Получаем информацию о профилях
-                    self._profiles_info = self.manager.get_all_profiles_info()
-                    
-                    # Получаем вывод wg show
-                    self._status_text = self.manager.get_wg_show_output()
-                    
-                    # Обновляем UI
-                    self._update_status_indicator()
-                    self._update_profile_buttons()
-                    self._update_status_text()
-                    self._update_status_bar()
-                    
-                    self.logger.debug("Данные успешно обновлены")
-                except Exception as e:
-                    self.logger.error(f"Ошибка при обновлении данных: {e}")
-                finally:
-                    with self._ui_lock:
-                        self._is_refreshing = False
-                        if hasattr(self, '_refresh_start_time'):
-                            del self._refresh_start_time
-                    self._set_ui_busy(False)
-            
-            # Запускаем в отдельном потоке
+            force = self._refresh_force
+            self._refresh_force = False
+        
+        self._set_ui_busy(True)
+        
+        def refresh_task():
+            started = time.monotonic()
             try:
-                thread = threading.Thread(target=refresh_task, daemon=True)
-                thread.start()
+                if force:
+                    self.manager.invalidate_snapshot()
+                
+                # Получаем активный профиль
+                active_profile = self.manager.get_active_profile()
+                
+                # Получаем информацию о профилях
+                profiles_info = self.manager.get_all_profiles_info()
+                
+                # Получаем вывод wg show
+                status_text = self._cached_wg_show(force)
+                
+                with self._state_lock:
+                    self._active_profile = active_profile
+                    self._profiles_info = profiles_info
+                    self._status_text = status_text
+                
+                # Обновляем UI
+                self._update_status_indicator()
+                self._update_profile_buttons()
+                self._update_status_text()
+                self._update_status_bar()
+                
+                self.logger.debug("Данные успешно обновлены")
             except Exception as e:
-                self.logger.error(f"Не удалось запустить поток обновления: {e}")
-                with self._ui_lock:
+                self.logger.error(f"Ошибка при обновлении данных: {e}")
+            finally:
+                with self._state_lock:
                     self._is_refreshing = False
+                self._refresh_durations.append(time.monotonic() - started)
                 self._set_ui_busy(False)
+        
+        # Выполняем в фоновом потоке
+        self._worker_queue.put(refresh_task)
+        return False
     
-    def _run_operation(self, operation_func, *args, **kwargs):
-        """Выполнить операцию с блокировкой UI"""
+    def _cached_wg_show(self, force: bool = False) -> str:
+        """
+        Получить вывод wg show, повторно используя его между тиками
+        
+        Текст на вкладке статуса меняется только при рукопожатиях и
+        передаче данных, поэтому таймер не запускает wg show на каждом
+        тике. Индикатор и строка состояния обновляются по снимку
+        состояния каждый тик.
+        
+        Args:
+            force: Запустить команду, не используя кэш
+        
+        Returns:
+            Вывод команды wg show
+        """
+        timestamp, output = self._wg_show_cache
+        now = time.monotonic()
+        if not force and output is not None and now - timestamp < self._wg_show_ttl:
+            return output
+        
+        output = self.manager.get_wg_show_output(force=force)
+        self._wg_show_cache = (now, output)
+        return output
+    
+    def _invalidate_wg_show_cache(self):
+        """Сбросить кэш вывода wg show"""
+        self._wg_show_cache = (0.0, None)
+    
+    def _run_operation(self, operation_func, args: Tuple = (),
+                       widget: Optional[Gtk.Widget] = None):
+        """
+        Выполнить операцию с блокировкой UI
+        
+        Args:
+            operation_func: Метод менеджера, возвращающий (успех, сообщение)
+            args: Аргументы операции
+            widget: Источник сигнала, если метод подключен к нему напрямую (не используется)
+        """
         if not self._debounce_click():
             self.logger.debug("Игнорируем быстрый повторный клик")
             return
@@ -643,7 +964,9 @@ class WireGuardManagerApp:
         
         def operation_task():
             try:
-                success, message = operation_func(*args, **kwargs)
+                success, message = operation_func(*args)
+                # Состояние интерфейсов могло измениться
+                self._invalidate_wg_show_cache()
                 
                 if success:
                     self.logger.info(f"Операция успешна: {message}")
@@ -661,8 +984,7 @@ class WireGuardManagerApp:
             finally:
                 self._set_ui_busy(False)
         
-        thread = threading.Thread(target=operation_task, daemon=True)
-        thread.start()
+        self._worker_queue.put(operation_task)
     
     def _adjust_dialog_position(self, dialog, offset_percent=30):
         """
@@ -679,25 +1001,7 @@ class WireGuardManagerApp:
                 if not screen:
                     return
                 
-                # Получаем размеры экрана (используем основной монитор)
-                try:
-                    screen_height = screen.get_height()
-                    screen_width = screen.get_width()
-                except Exception:
-                    # fallback: используем геометрию монитора
-                    display = Gdk.Display.get_default()
-                    if display:
-                        monitor = display.get_primary_monitor() or display.get_monitor(0)
-                        if monitor:
-                            geometry = monitor.get_geometry()
-                            screen_height = geometry.height
-                            screen_width = geometry.width
-                        else:
-                            screen_height = 768
-                            screen_width = 1024
-                    else:
-                        screen_height = 768
-                        screen_width = 1024
+                screen_height = self._get_screen_height(screen)
                 
                 # Получаем текущую позицию окна
                 x, y = widget.get_position()
@@ -728,82 +1032,138 @@ class WireGuardManagerApp:
         
         dialog.connect('realize', on_dialog_realize)
     
+    def _get_screen_height(self, screen: Gdk.Screen) -> int:
+        """
+        Получить высоту экрана (кэшируется до изменения конфигурации мониторов)
+        
+        Args:
+            screen: Экран, на котором показывается диалог
+        
+        Returns:
+            Высота экрана в пикселях
+        """
+        if self._screen_height is not None:
+            return self._screen_height
+        
+        # Получаем размеры экрана (используем основной монитор)
+        try:
+            screen_height = screen.get_height()
+        except Exception:
+            # fallback: используем геометрию монитора
+            display = Gdk.Display.get_default()
+            monitor = None
+            if display:
+                monitor = display.get_primary_monitor() or display.get_monitor(0)
+            screen_height = monitor.get_geometry().height if monitor else 768
+        
+        self._screen_height = screen_height
+        return screen_height
+    
+    def _invalidate_geometry_cache(self, screen: Gdk.Screen):
+        """Сбросить кэш размеров экрана при изменении мониторов"""
+        self._screen_height = None
+    
+    def _get_notification_dialog(self) -> Gtk.MessageDialog:
+        """
+        Получить диалог уведомления
+        
+        Возвращает созданный ранее диалог, если он сейчас не показан;
+        иначе создает новый.
+        """
+        dialog = self._notification_dialog
+        if dialog is not None and not dialog.get_visible():
+            return dialog
+        
+        # Создаем диалог с parent, если окно существует
+        dialog = Gtk.MessageDialog(
+            transient_for=self.window,
+            flags=0,
+            message_type=Gtk.MessageType.INFO,
+            buttons=Gtk.ButtonsType.OK,
+            text=""
+        )
+        
+        dialog.set_modal(True)
+        dialog.connect("response", self._on_notification_response)
+        
+        # Настраиваем позицию диалога (сдвигаем на 30% ниже)
+        self._adjust_dialog_position(dialog, offset_percent=30)
+        
+        if self._notification_dialog is None:
+            self._notification_dialog = dialog
+        return dialog
+    
     def _show_notification(self, title: str, message: str, icon_name: str):
         """Показать уведомление"""
         try:
-            # Создаем диалог с parent, если окно существует
-            if self.window and self.window.get_property('visible'):
-                dialog = Gtk.MessageDialog(
-                    transient_for=self.window,
-                    flags=0,
-                    message_type=Gtk.MessageType.INFO,
-                    buttons=Gtk.ButtonsType.OK,
-                    text=title
-                )
-                # Устанавливаем позицию относительно родительского окна
-                dialog.set_position(Gtk.WindowPosition.CENTER_ON_PARENT)
-            else:
-                dialog = Gtk.MessageDialog(
-                    parent=None,
-                    flags=0,
-                    message_type=Gtk.MessageType.INFO,
-                    buttons=Gtk.ButtonsType.OK,
-                    text=title
-                )
-                # Центрируем на экране
-                dialog.set_position(Gtk.WindowPosition.CENTER)
-            
-            dialog.format_secondary_text(message)
-            
-            # Устанавливаем иконку
+            dialog = self._get_notification_dialog()
             try:
+                dialog.set_property('text', title)
+                dialog.format_secondary_text(message)
+                
+                if self.window and self.window.get_property('visible'):
+                    # Устанавливаем позицию относительно родительского окна
+                    dialog.set_position(Gtk.WindowPosition.CENTER_ON_PARENT)
+                else:
+                    # Центрируем на экране
+                    dialog.set_position(Gtk.WindowPosition.CENTER)
+                
+                # Устанавливаем иконку
                 dialog.set_icon_name(icon_name)
-            except:
-                pass
-            
-            # Настраиваем позицию диалога (сдвигаем на 30% ниже)
-            self._adjust_dialog_position(dialog, offset_percent=30)
-            
-            dialog.run()
-            dialog.destroy()
+                
+                # Не блокируем главный цикл: диалог закроется в обработчике response
+                dialog.show()
+            except Exception:
+                self._on_notification_response(dialog, Gtk.ResponseType.NONE)
+                raise
         except Exception as e:
             self.logger.error(f"Ошибка при показе уведомления: {e}")
             # Выводим в консоль как запасной вариант
             print(f"{title}: {message}")
     
-    # Обработчики событий
-    
-    def _on_off_clicked(self, button: Gtk.Button):
-        """Обработчик клика по кнопке OFF"""
-        self._run_operation(self.manager.turn_off_all)
-    
-    def _on_bombox_clicked(self, button: Gtk.Button):
-        """Обработчик клика по кнопке bomBox"""
-        self._run_operation(self.manager.activate_profile, "bomBox")
+    def _on_notification_response(self, dialog: Gtk.MessageDialog, response_id: int):
+        """Обработчик ответа диалога уведомления"""
+        # Общий диалог только скрываем, чтобы показать его снова;
+        # временный уничтожаем
+        if dialog is self._notification_dialog:
+            dialog.hide()
+        else:
+            dialog.destroy()
     
-    def _on_app_clicked(self, button: Gtk.Button):
-        """Обработчик клика по кнопке App"""
-        self._run_operation(self.manager.activate_profile, "App")
+    # Обработчики событий
     
     def _on_refresh_clicked(self, button: Gtk.Button):
         """Обработчик клика по кнопке обновления"""
-        self._refresh_data()
+        self._refresh_data(force=True)
     
     def _on_save_log_clicked(self, button: Gtk.Button):
         """Обработчик клика по кнопке сохранения логов"""
-        dialog = Gtk.FileChooserDialog(
-            title="Сохранить логи",
-            parent=self.window,
-            action=Gtk.FileChooserAction.SAVE,
-            buttons=(
-                Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL,
-                Gtk.STOCK_SAVE, Gtk.ResponseType.OK
+        # Диалог выбора файла создается один раз: его построение дорогое
+        dialog = self._save_log_dialog
+        if dialog is None:
+            dialog = Gtk.FileChooserDialog(
+                title="Сохранить логи",
+                parent=self.window,
+                action=Gtk.FileChooserAction.SAVE,
+                buttons=(
+                    Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL,
+                    Gtk.STOCK_SAVE, Gtk.ResponseType.OK
+                )
             )
-        )
+            
+            dialog.set_modal(True)
+            dialog.connect("response", self._on_save_log_response)
+            
+            # Сдвигаем диалог на 30% ниже
+            self._adjust_dialog_position(dialog, offset_percent=30)
+            self._save_log_dialog = dialog
+        elif dialog.get_visible():
+            # Диалог уже открыт - просто поднимаем его
+            dialog.present()
+            return
         
         # Устанавливаем имя файла по умолчанию
-        default_name = f"wg-manager-logs-{datetime.now().strftime('%Y%m%d-%H%M%S')}.txt"
-        dialog.set_current_name(default_name)
+        dialog.set_current_name(_LOG_NAME_FMT.format(datetime.now()))
         
         # Настраиваем позицию диалога
         if self.window and self.window.get_property('visible'):
@@ -811,67 +1171,112 @@ class WireGuardManagerApp:
         else:
             dialog.set_position(Gtk.WindowPosition.CENTER)
         
-        # Сдвигаем диалог на 30% ниже
-        self._adjust_dialog_position(dialog, offset_percent=30)
-        
-        response = dialog.run()
-        if response == Gtk.ResponseType.OK:
-            filename = dialog.get_filename()
-            success = export_logs(filename, lines=1000)
-            
-            if success:
-                self._show_notification(
-                    "Успех",
-                    f"Логи сохранены в {filename}",
-                    "document-save"
-                )
-            else:
-                self._show_notification(
-                    "Ошибка",
-                    "Не удалось сохранить логи",
-                    "dialog-error"
-                )
-        
-        dialog.destroy()
+        # Не блокируем главный цикл: результат обработает _on_save_log_response
+        dialog.show()
+    
+    def _on_save_log_response(self, dialog: Gtk.FileChooserDialog, response_id: int):
+        """Обработчик ответа диалога сохранения логов"""
+        filename = dialog.get_filename()
+        dialog.hide()
+        if response_id == Gtk.ResponseType.OK and filename:
+            # Запись файла - чистый ввод-вывод, выполняем ее в фоновом потоке
+            self._worker_queue.put(functools.partial(self._export_logs_worker, filename))
+    
+    def _export_logs_worker(self, filename: str):
+        """Экспортировать логи в файл (в фоновом потоке) и показать результат"""
+        success = export_logs(filename, lines=1000)
+        
+        if success:
+            self._safe_idle_add(
+                self._show_notification,
+                "Успех",
+                f"Логи сохранены в {filename}",
+                "document-save"
+            )
+        else:
+            self._safe_idle_add(
+                self._show_notification,
+                "Ошибка",
+                "Не удалось сохранить логи",
+                "dialog-error"
+            )
+    
+    def _on_switch_page(self, notebook: Gtk.Notebook, page: Gtk.Widget, page_num: int):
+        """Обработчик переключения вкладок: применить отложенный текст статуса"""
+        if page_num != self._status_page_index or self._pending_status_text is None:
+            return
+        text = self._pending_status_text
+        self._pending_status_text = None
+        self._set_buffer_text('status', self.status_textview.get_buffer(), text)
     
     def _on_refresh_logs_clicked(self, button: Gtk.Button):
         """Обработчик клика по кнопке обновления логов"""
-        # Запускаем обновление логов через idle_add для безопасности
-        self._safe_idle_add(self._update_logs_text)
+        # Частые клики объединяются в одно чтение файла
+        if self._logs_refresh_pending:
+            return
+        self._logs_refresh_pending = True
+        GLib.timeout_add(self._refresh_debounce_ms, self._do_refresh_logs)
+    
+    def _do_refresh_logs(self):
+        """Запустить чтение логов"""
+        self._logs_refresh_pending = False
+        # Значение читаем в главном потоке, файл - в фоновом
+        lines = int(self.log_lines_spin.get_value())
+        self._worker_queue.put(functools.partial(self._update_logs_text, lines))
+        return False
     
     def _on_clear_logs_clicked(self, button: Gtk.Button):
         """Обработчик клика по кнопке очистки логов"""
         textbuffer = self.logs_textview.get_buffer()
-        self._safe_idle_add(textbuffer.set_text, "")
+        # Обработчик уже выполняется в главном потоке: очищаем сразу,
+        # пустой буфер не трогаем
+        if textbuffer.get_char_count() > 0:
+            self._set_buffer_text('logs', textbuffer, "")
     
     def _on_destroy(self, window: Gtk.Window):
         """Обработчик закрытия окна"""
         self.logger.info("Приложение завершает работу")
+        # Сначала останавливаем таймер и фоновый поток, остальное - после
+        # того, как уже поставленные в главный цикл обработчики отработают
         self._stop_auto_refresh()
+        self._worker_queue.put(None)
+        GLib.idle_add(self._final_shutdown)
+    
+    def _final_shutdown(self):
+        """Освободить ресурсы и выйти из главного цикла"""
+        # Освобождаем диалоги, которые хранились для повторного показа
+        for dialog in (self._save_log_dialog, self._notification_dialog):
+            if dialog is not None:
+                dialog.destroy()
+        self._save_log_dialog = None
+        self._notification_dialog = None
         self.window = None
         Gtk.main_quit()
+        return False
     
-    def _on_key_press(self, widget: Gtk.Widget, event: Gdk.EventKey) -> bool:
-        """Обработчик нажатия клавиш"""
-        # Ctrl+1 - OFF
-        if event.state & Gdk.ModifierType.CONTROL_MASK and event.keyval == Gdk.KEY_1:
-            self._on_off_clicked(None)
-            return True
-        # Ctrl+2 - bomBox
-        elif event.state & Gdk.ModifierType.CONTROL_MASK and event.keyval == Gdk.KEY_2:
-            self._on_bombox_clicked(None)
-            return True
-        # Ctrl+3 - App
-        elif event.state & Gdk.ModifierType.CONTROL_MASK and event.keyval == Gdk.KEY_3:
-            self._on_app_clicked(None)
-            return True
-        # F5 - обновить
-        elif event.keyval == Gdk.KEY_F5:
-            self._refresh_data()
-            return True
+    def _on_window_state(self, widget: Gtk.Widget, event: Gdk.EventWindowState) -> bool:
+        """Обработчик смены состояния окна: пауза автообновления в свернутом окне"""
+        hidden = Gdk.WindowState.ICONIFIED | Gdk.WindowState.WITHDRAWN
+        if not event.changed_mask & hidden:
+            return False
         
+        if event.new_window_state & hidden:
+            self._stop_auto_refresh()
+        elif self._refresh_timer_id is None:
+            # Окно снова показано: сразу обновляем данные и возобновляем таймер
+            self._refresh_data()
+            self._start_auto_refresh()
         return False
     
+    def _on_key_press(self, widget: Gtk.Widget, event: Gdk.EventKey) -> bool:
+        """Обработчик нажатия клавиш"""
+        mask = event.state & Gdk.ModifierType.CONTROL_MASK
+        handler = self._key_handlers.get((mask, event.keyval))
+        if handler is None:
+            return False
+        handler()
+        return True
+    
     def _check_initial_state(self):
         """Проверить начальное состояние системы и показать предупреждения"""
         def check_task():
@@ -885,17 +1290,19 @@ class WireGuardManagerApp:
                                        f"Некоторые функции могут не работать: {message}", 
                                        "dialog-warning")
                 
-                # Пробуем получить статус WireGuard
-                success, output = self.manager._run_command_with_retry(['wg', 'show'], timeout=10)
-                if not success:
-                    if "authentication canceled" in output.lower() or "not authorized" in output.lower():
+                # Пробуем получить статус WireGuard через менеджер: без pkexec
+                # при наличии CAP_NET_ADMIN, а результат остается в кэше
+                # для первого обновления вкладки статуса
+                output = self._cached_wg_show()
+                if output.startswith(_WG_SHOW_ERROR_PREFIX):
+                    if _AUTH_ERR_RE.search(output):
                         self.logger.warning("Аутентификация отменена пользователем")
                         self._safe_idle_add(self._show_notification,
                                            "Требуются права администратора",
                                            "Для управления WireGuard нужны права администратора. "
                                            "При запросе пароля введите пароль вашей учётной записи.",
                                            "dialog-information")
-                    elif "command not found" in output.lower():
+                    elif _NOTFOUND_RE.search(output):
                         self.logger.error("Команда wg не найдена")
                         self._safe_idle_add(self._show_notification,
                                            "WireGuard не установлен",
@@ -904,22 +1311,43 @@ class WireGuardManagerApp:
             except Exception as e:
                 self.logger.error(f"Ошибка при проверке начального состояния: {e}")
         
-        # Запускаем проверку в фоновом потоке
-        thread = threading.Thread(target=check_task, daemon=True)
-        thread.start()
+        # Проверка может ждать ввода пароля, поэтому выполняется фоновым
+        # потоком UI вместе с остальными задачами, а не в отдельном потоке
+        self._worker_queue.put(check_task)
     
     def _start_auto_refresh(self):
-        """Запустить автоматическое обновление каждые 2 секунды"""
+        """Запустить автоматическое обновление (целевой интервал 2 секунды)"""
         if self._refresh_timer_id is not None:
             GLib.source_remove(self._refresh_timer_id)
         
-        def refresh_callback():
+        self._schedule_auto_refresh(self._refresh_interval)
+        self.logger.debug(f"Автообновление запущено (интервал {self._refresh_interval:g} секунды)")
+    
+    def _schedule_auto_refresh(self, delay: float):
+        """Запланировать следующий тик автообновления через delay секунд"""
+        if delay >= 1:
+            # Секундный таймер: GLib группирует такие пробуждения с другими
+            self._refresh_timer_id = GLib.timeout_add_seconds(round(delay), self._on_refresh_tick)
+        else:
+            self._refresh_timer_id = GLib.timeout_add(int(delay * 1000), self._on_refresh_tick)
+    
+    def _on_refresh_tick(self):
+        """Тик автообновления: обновить данные и выбрать задержку до следующего"""
+        self._refresh_timer_id = None
+        if self.window is None:
+            return False
+        # Скрытое окно не обновляем: данные все равно никто не видит
+        if self.window.get_visible():
             self._refresh_data()
-            return True  # Продолжаем таймер
         
-        # 2000 миллисекунд = 2 секунды
-        self._refresh_timer_id = GLib.timeout_add(2000, refresh_callback)
-        self.logger.debug("Автообновление запущено (интервал 2 секунды)")
+        # Обновление выполняется в фоновом потоке, поэтому тики не должны
+        # идти чаще, чем обновления успевают завершаться: берем целевой
+        # интервал, но не меньше средней длительности обновления с запасом
+        durations = list(self._refresh_durations)
+        expected = sum(durations) / len(durations) if durations else 0.0
+        delay = max(self._refresh_interval, expected + self._min_refresh_delay)
+        self._schedule_auto_refresh(delay)
+        return False
     
     def _stop_auto_refresh(self):
         """Остановить автоматическое обновление"""
@@ -932,7 +1360,7 @@ class WireGuardManagerApp:
         """Запустить приложение"""
         self.logger.info("Запуск GUI приложения")
         self.window.show_all()
-        # Запускаем автообновление каждые 2 секунды
+        # Запускаем автообновление
         self._start_auto_refresh()
         Gtk.main()
         return 0